@@ -276,7 +276,7 @@ class AgentLoop:
         # 保存到会话
         session.add_message("user", msg.content)
         session.add_message("assistant", final_content)
-        self.sessions.save(session)
+        await self.sessions.asave(session)
         
         return OutboundMessage(
             channel=msg.channel,
@@ -382,7 +382,7 @@ class AgentLoop:
         # 保存到会话（在历史中标记为系统消息）
         session.add_message("user", f"[System: {msg.sender_id}] {msg.content}")
         session.add_message("assistant", final_content)
-        self.sessions.save(session)
+        await self.sessions.asave(session)
         
         return OutboundMessage(
             channel=origin_channel,
@@ -9,10 +9,12 @@ from __future__ import annotations
 
 import asyncio
 import json
-from collections import deque
+import os
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any
+from datetime import datetime, timezone
+from itertools import chain, islice
+from typing import Any, Iterator
 
 import httpx
 from loguru import logger
@@ -21,6 +23,7 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import MochatConfig
+from nanobot.utils import fastjson
 from nanobot.utils.helpers import get_data_path
 
 try:
@@ -37,7 +40,18 @@ except ImportError:
     MSGPACK_AVAILABLE = False
 
 MAX_SEEN_MESSAGE_IDS = 2000  # 最大已处理消息ID数量
+BATCH_WATCH_PATH = "/api/claw/sessions/watchAll"  # 批量watch端点
 CURSOR_SAVE_DEBOUNCE_S = 0.5  # 游标保存防抖时间（秒）
+MAX_TAIL_FLUSHES = 3  # 单次flush后最多追加分发的尾批次数
+FALLBACK_STOP_TIMEOUT_S = 2.0  # 停止回退worker的最长等待时间（秒）
+
+
+class MochatHTTPError(RuntimeError):
+    """Mochat后端返回非2xx状态码。"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"Mochat HTTP {status_code}: {detail}")
+        self.status_code = status_code
 
 
 # ---------------------------------------------------------------------------
@@ -71,6 +85,7 @@ class DelayState:
     entries: list[MochatBufferedEntry] = field(default_factory=list)  # 延迟条目列表
     lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # 异步锁
     timer: asyncio.Task | None = None  # 定时器任务
+    flushing: bool = False  # 是否正在分发；期间到达的条目留给尾批，不另起定时器
 
 
 @dataclass
@@ -101,6 +116,26 @@ def _safe_dict(value: Any) -> dict:
     return value if isinstance(value, dict) else {}
 
 
+def _as_dict(value: Any) -> dict | None:
+    """如果value是字典则返回，否则返回None。"""
+    return value if isinstance(value, dict) else None
+
+
+def _str_key(src: dict, key: str) -> str:
+    """
+    ``_str_field``的单键版本，省去可变参数元组和循环开销。
+
+    Args:
+        src: 源字典
+        key: 要查找的键
+
+    Returns:
+        去除首尾空格后的字符串值，不存在或为空时返回空字符串
+    """
+    v = src.get(key)
+    return v.strip() if isinstance(v, str) else ""
+
+
 def _str_field(src: dict, *keys: str) -> str:
     """
     返回在keys中找到的第一个非空字符串值（去除首尾空格）。
@@ -114,8 +149,8 @@ def _str_field(src: dict, *keys: str) -> str:
     """
     for k in keys:
         v = src.get(k)
-        if isinstance(v, str) and v.strip():
-            return v.strip()
+        if isinstance(v, str) and (v := v.strip()):
+            return v
     return ""
 
 
@@ -165,10 +200,14 @@ def normalize_mochat_content(content: Any) -> str:
     失败时回退到``str(content)``。
     """
     if isinstance(content, str):
+        # 快速路径：绝大多数消息首尾没有空白，直接返回原字符串
+        if content and not content[:1].isspace() and not content[-1:].isspace():
+            return content
         return content.strip()
     if content is None:
         return ""
     try:
+        # 保持标准库的", "/": "分隔符：这段文本会原样进入LLM上下文
         return json.dumps(content, ensure_ascii=False)
     except TypeError:
         return str(content)
@@ -198,26 +237,40 @@ def resolve_mochat_target(raw: str) -> MochatTarget:
     return MochatTarget(id=cleaned, is_panel=forced_panel or not cleaned.startswith("session_"))
 
 
-def extract_mention_ids(value: Any) -> list[str]:
-    """
-    从异构的mention负载中提取mention ID列表。
-
-    兼容字符串列表和包含多种键名（id/userId/_id）的字典列表。
-    """
+def _iter_mention_ids(value: Any) -> Iterator[str]:
+    """惰性地逐个产出mention负载中的ID。"""
     if not isinstance(value, list):
-        return []
-    ids: list[str] = []
+        return
     for item in value:
         if isinstance(item, str):
-            if item.strip():
-                ids.append(item.strip())
+            item = item.strip()
+            if item:
+                yield item
         elif isinstance(item, dict):
             for key in ("id", "userId", "_id"):
                 candidate = item.get(key)
-                if isinstance(candidate, str) and candidate.strip():
-                    ids.append(candidate.strip())
+                if isinstance(candidate, str) and (candidate := candidate.strip()):
+                    yield candidate
                     break
-    return ids
+
+
+def extract_mention_ids(value: Any) -> list[str]:
+    """
+    从异构的mention负载中提取mention ID列表。
+
+    兼容字符串列表和包含多种键名（id/userId/_id）的字典列表。
+    """
+    return list(_iter_mention_ids(value))
+
+
+def mention_ids_contains(value: Any, target: str) -> bool:
+    """
+    判断mention负载中是否包含目标ID。
+
+    与``target in extract_mention_ids(value)``等价，但命中后立即返回，
+    不会构建完整列表。
+    """
+    return any(mid == target for mid in _iter_mention_ids(value))
 
 
 def resolve_was_mentioned(payload: dict[str, Any], agent_user_id: str) -> bool:
@@ -232,7 +285,7 @@ def resolve_was_mentioned(payload: dict[str, Any], agent_user_id: str) -> bool:
         if meta.get("mentioned") is True or meta.get("wasMentioned") is True:
             return True
         for f in ("mentions", "mentionIds", "mentionedUserIds", "mentionedUsers"):
-            if agent_user_id and agent_user_id in extract_mention_ids(meta.get(f)):
+            if agent_user_id and mention_ids_contains(meta.get(f), agent_user_id):
                 return True
     if not agent_user_id:
         return False
@@ -255,27 +308,44 @@ def resolve_require_mention(config: MochatConfig, session_id: str, group_id: str
     return bool(config.mention.require_in_groups)
 
 
+def extract_session_payloads(data: Any) -> list[dict[str, Any]]:
+    """
+    从订阅/批量watch响应中提取逐会话的payload列表。
+
+    兼容payload列表、``{"sessions": [...]}``以及单个会话payload三种形式。
+    """
+    if isinstance(data, list):
+        return [i for i in data if isinstance(i, dict)]
+    if isinstance(data, dict):
+        sessions = data.get("sessions")
+        if isinstance(sessions, list):
+            return [i for i in sessions if isinstance(i, dict)]
+        if "sessionId" in data:
+            return [data]
+    return []
+
+
+def _buffered_line(entry: MochatBufferedEntry, is_group: bool) -> str:
+    """渲染单个缓冲条目，群聊时加上发送者标签。"""
+    if is_group:
+        label = entry.sender_name.strip() or entry.sender_username.strip() or entry.author
+        if label:
+            return f"{label}: {entry.raw_body}"
+    return entry.raw_body
+
+
 def build_buffered_body(entries: list[MochatBufferedEntry], is_group: bool) -> str:
     """
     从一个或多个缓冲条目构建文本内容。
 
     在群聊场景下，会在每行前添加发送者标签以便区分来源。
+    每次flush都会换出条目列表，因此每个条目只会被渲染一次。
     """
     if not entries:
         return ""
     if len(entries) == 1:
         return entries[0].raw_body
-    lines: list[str] = []
-    for entry in entries:
-        if not entry.raw_body:
-            continue
-        if is_group:
-            label = entry.sender_name.strip() or entry.sender_username.strip() or entry.author
-            if label:
-                lines.append(f"{label}: {entry.raw_body}")
-                continue
-        lines.append(entry.raw_body)
-    return "\n".join(lines).strip()
+    return "\n".join(_buffered_line(e, is_group) for e in entries if e.raw_body).strip()
 
 
 def parse_timestamp(value: Any) -> int | None:
@@ -310,30 +380,51 @@ class MochatChannel(BaseChannel):
         super().__init__(config, bus)
         self.config: MochatConfig = config
         self._http: httpx.AsyncClient | None = None
+        self._base_url = config.base_url.strip().rstrip("/")
+        self._post_headers = httpx.Headers({
+            "Content-Type": "application/json", "X-Claw-Token": config.claw_token,
+        })
         self._socket: Any = None
         self._ws_connected = self._ws_ready = False
 
         self._state_dir = get_data_path() / "mochat"
         self._cursor_path = self._state_dir / "session_cursors.json"
-        self._session_cursor: dict[str, int] = {}
-        self._cursor_save_task: asyncio.Task | None = None
+        self._session_cursor: OrderedDict[str, int] = OrderedDict()
+        self._cursor_dirty = asyncio.Event()
+        self._cursor_unsaved = False
+        self._cursor_save_lock = asyncio.Lock()
+        self._cursor_writer_task: asyncio.Task | None = None
 
         self._session_set: set[str] = set()
+        self._configured_sessions: set[str] = set()  # 配置中显式列出的会话，不参与LRU淘汰
+        self._session_activity: OrderedDict[str, None] = OrderedDict()  # 所有跟踪中会话的最近活动顺序
         self._panel_set: set[str] = set()
         self._auto_discover_sessions = self._auto_discover_panels = False
 
         self._cold_sessions: set[str] = set()
-        self._session_by_converse: dict[str, str] = {}
+        self._session_by_converse: OrderedDict[str, str] = OrderedDict()
 
         self._seen_set: dict[str, set[str]] = {}
         self._seen_queue: dict[str, deque[str]] = {}
         self._delay_states: dict[str, DelayState] = {}
+        self._delay_stopped = asyncio.Event()
 
         self._fallback_mode = False
         self._session_fallback_tasks: dict[str, asyncio.Task] = {}
         self._panel_fallback_tasks: dict[str, asyncio.Task] = {}
+        self._batch_watch_task: asyncio.Task | None = None
+        self._batch_watch_supported = True
         self._refresh_task: asyncio.Task | None = None
+        self._directory_refresh: asyncio.Task | None = None
         self._target_locks: dict[str, asyncio.Lock] = {}
+        # notify事件名 -> 处理函数，注册时直接绑定，避免每个事件再做字符串分支
+        self._notify_dispatch = {
+            "notify:chat.inbox.append": self._handle_notify_inbox_append,
+            "notify:chat.message.add": self._handle_notify_chat_message,
+            "notify:chat.message.update": self._handle_notify_chat_message,
+            "notify:chat.message.recall": self._handle_notify_chat_message,
+            "notify:chat.message.delete": self._handle_notify_chat_message,
+        }
 
     # ---- lifecycle ---------------------------------------------------------
 
@@ -349,9 +440,17 @@ class MochatChannel(BaseChannel):
             return
 
         self._running = True
-        self._http = httpx.AsyncClient(timeout=30.0)
+        self._delay_stopped.clear()
+        # 启用HTTP/2，让各个回退watch长轮询复用同一条连接
+        self._http = httpx.AsyncClient(
+            http2=True, timeout=30.0,
+            limits=httpx.Limits(
+                max_keepalive_connections=32, max_connections=64, keepalive_expiry=60.0,
+            ),
+        )
         self._state_dir.mkdir(parents=True, exist_ok=True)
         await self._load_session_cursors()
+        self._cursor_writer_task = asyncio.create_task(self._cursor_writer())
         self._seed_targets_from_config()
         await self._refresh_targets(subscribe_new=False)
 
@@ -384,9 +483,9 @@ class MochatChannel(BaseChannel):
                 pass
             self._socket = None
 
-        if self._cursor_save_task:
-            self._cursor_save_task.cancel()
-            self._cursor_save_task = None
+        if self._cursor_writer_task:
+            self._cursor_writer_task.cancel()
+            self._cursor_writer_task = None
         await self._save_session_cursors()
 
         if self._http:
@@ -434,8 +533,10 @@ class MochatChannel(BaseChannel):
         sessions, self._auto_discover_sessions = self._normalize_id_list(self.config.sessions)
         panels, self._auto_discover_panels = self._normalize_id_list(self.config.panels)
         self._session_set.update(sessions)
+        self._configured_sessions.update(sessions)
         self._panel_set.update(panels)
         for sid in sessions:
+            self._touch_session(sid)
             if sid not in self._session_cursor:
                 self._cold_sessions.add(sid)
 
@@ -494,10 +595,8 @@ class MochatChannel(BaseChannel):
         async def on_panel_events(payload: dict[str, Any]) -> None:
             await self._handle_watch_payload(payload, "panel")
 
-        for ev in ("notify:chat.inbox.append", "notify:chat.message.add",
-                    "notify:chat.message.update", "notify:chat.message.recall",
-                    "notify:chat.message.delete"):
-            client.on(ev, self._build_notify_handler(ev))
+        for ev, handler in self._notify_dispatch.items():
+            client.on(ev, handler)
 
         socket_url = (self.config.socket_url or self.config.base_url).strip().rstrip("/")
         socket_path = (self.config.socket_path or "/socket.io").strip().lstrip("/")
@@ -519,14 +618,6 @@ class MochatChannel(BaseChannel):
             self._socket = None
             return False
 
-    def _build_notify_handler(self, event_name: str):
-        async def handler(payload: Any) -> None:
-            if event_name == "notify:chat.inbox.append":
-                await self._handle_notify_inbox_append(payload)
-            elif event_name.startswith("notify:chat.message."):
-                await self._handle_notify_chat_message(payload)
-        return handler
-
     # ---- subscribe ---------------------------------------------------------
 
     async def _subscribe_all(self) -> bool:
@@ -551,17 +642,7 @@ class MochatChannel(BaseChannel):
             logger.error(f"Mochat subscribeSessions failed: {ack.get('message', 'unknown error')}")
             return False
 
-        data = ack.get("data")
-        items: list[dict[str, Any]] = []
-        if isinstance(data, list):
-            items = [i for i in data if isinstance(i, dict)]
-        elif isinstance(data, dict):
-            sessions = data.get("sessions")
-            if isinstance(sessions, list):
-                items = [i for i in sessions if isinstance(i, dict)]
-            elif "sessionId" in data:
-                items = [data]
-        for p in items:
+        for p in extract_session_payloads(ack.get("data")):
             await self._handle_watch_payload(p, "session")
         return True
 
@@ -617,17 +698,22 @@ class MochatChannel(BaseChannel):
         for s in sessions:
             if not isinstance(s, dict):
                 continue
-            sid = _str_field(s, "sessionId")
+            sid = _str_key(s, "sessionId")
             if not sid:
                 continue
             if sid not in self._session_set:
                 self._session_set.add(sid)
+                self._touch_session(sid)
                 new_ids.append(sid)
                 if sid not in self._session_cursor:
                     self._cold_sessions.add(sid)
-            cid = _str_field(s, "converseId")
+            cid = _str_key(s, "converseId")
             if cid:
                 self._session_by_converse[cid] = sid
+                self._session_by_converse.move_to_end(cid)
+        self._trim_session_maps()
+        # 刚加入就被淘汰的会话不再订阅
+        new_ids = [sid for sid in new_ids if sid in self._session_set]
 
         if not new_ids:
             return
@@ -636,6 +722,19 @@ class MochatChannel(BaseChannel):
         if self._fallback_mode:
             await self._ensure_fallback_workers()
 
+    async def _refresh_sessions_directory_once(self) -> None:
+        """
+        合并并发的会话目录刷新请求（single-flight）。
+
+        一批未知converse的inbox事件同时到达时，只发起一次HTTP刷新，
+        其余调用方等待同一个任务；shield保证单个调用方被取消时不会打断共享刷新。
+        """
+        if self._directory_refresh is None or self._directory_refresh.done():
+            self._directory_refresh = asyncio.create_task(
+                self._refresh_sessions_directory(self._ws_ready)
+            )
+        await asyncio.shield(self._directory_refresh)
+
     async def _refresh_panels(self, subscribe_new: bool) -> None:
         try:
             response = await self._post_json("/api/claw/groups/get", {})
@@ -672,22 +771,34 @@ class MochatChannel(BaseChannel):
         if not self._running:
             return
         self._fallback_mode = True
-        for sid in sorted(self._session_set):
-            t = self._session_fallback_tasks.get(sid)
-            if not t or t.done():
-                self._session_fallback_tasks[sid] = asyncio.create_task(self._session_watch_worker(sid))
-        for pid in sorted(self._panel_set):
+        if self.config.batch_fallback_watch and self._batch_watch_supported:
+            if self._session_set and (not self._batch_watch_task or self._batch_watch_task.done()):
+                self._batch_watch_task = asyncio.create_task(self._multi_session_watch_worker())
+        else:
+            for sid in self._session_set:
+                t = self._session_fallback_tasks.get(sid)
+                if not t or t.done():
+                    self._session_fallback_tasks[sid] = asyncio.create_task(self._session_watch_worker(sid))
+        for pid in self._panel_set:
             t = self._panel_fallback_tasks.get(pid)
             if not t or t.done():
                 self._panel_fallback_tasks[pid] = asyncio.create_task(self._panel_poll_worker(pid))
 
     async def _stop_fallback_workers(self) -> None:
         self._fallback_mode = False
-        tasks = [*self._session_fallback_tasks.values(), *self._panel_fallback_tasks.values()]
+        tasks = {
+            t for t in chain(self._session_fallback_tasks.values(),
+                             self._panel_fallback_tasks.values(), (self._batch_watch_task,))
+            if t and not t.done()
+        }
+        self._batch_watch_task = None
         for t in tasks:
             t.cancel()
         if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+            # 不无限等待：吞掉CancelledError的worker不应阻塞关闭流程
+            _, pending = await asyncio.wait(tasks, timeout=FALLBACK_STOP_TIMEOUT_S)
+            if pending:
+                logger.warning(f"Mochat fallback workers did not stop in time: {len(pending)}")
         self._session_fallback_tasks.clear()
         self._panel_fallback_tasks.clear()
 
@@ -705,6 +816,31 @@ class MochatChannel(BaseChannel):
                 logger.warning(f"Mochat watch fallback error ({session_id}): {e}")
                 await asyncio.sleep(max(0.1, self.config.retry_delay_ms / 1000.0))
 
+    async def _multi_session_watch_worker(self) -> None:
+        """用单个长轮询请求watch全部会话，后端不支持时退回逐会话worker。"""
+        while self._running and self._fallback_mode:
+            try:
+                payload = await self._post_json(BATCH_WATCH_PATH, {
+                    "sessionIds": list(self._session_set), "cursors": self._session_cursor,
+                    "timeoutMs": self.config.watch_timeout_ms, "limit": self.config.watch_limit,
+                })
+                for p in extract_session_payloads(payload):
+                    await self._handle_watch_payload(p, "session")
+            except asyncio.CancelledError:
+                break
+            except MochatHTTPError as e:
+                if e.status_code in (404, 405, 501):
+                    logger.warning("Mochat batch watch unsupported, using per-session fallback")
+                    self._batch_watch_supported = False
+                    self._batch_watch_task = None
+                    await self._ensure_fallback_workers()
+                    return
+                logger.warning(f"Mochat batch watch fallback error: {e}")
+                await asyncio.sleep(max(0.1, self.config.retry_delay_ms / 1000.0))
+            except Exception as e:
+                logger.warning(f"Mochat batch watch fallback error: {e}")
+                await asyncio.sleep(max(0.1, self.config.retry_delay_ms / 1000.0))
+
     async def _panel_poll_worker(self, panel_id: str) -> None:
         sleep_s = max(1.0, self.config.refresh_interval_ms / 1000.0)
         while self._running and self._fallback_mode:
@@ -737,7 +873,7 @@ class MochatChannel(BaseChannel):
     async def _handle_watch_payload(self, payload: dict[str, Any], target_kind: str) -> None:
         if not isinstance(payload, dict):
             return
-        target_id = _str_field(payload, "sessionId")
+        target_id = _str_key(payload, "sessionId")
         if not target_id:
             return
 
@@ -769,13 +905,13 @@ class MochatChannel(BaseChannel):
         if not isinstance(payload, dict):
             return
 
-        author = _str_field(payload, "author")
+        author = _str_key(payload, "author")
         if not author or (self.config.agent_user_id and author == self.config.agent_user_id):
             return
         if not self.is_allowed(author):
             return
 
-        message_id = _str_field(payload, "messageId")
+        message_id = _str_key(payload, "messageId")
         seen_key = f"{target_kind}:{target_id}"
         if message_id and self._remember_message_id(seen_key, message_id):
             return
@@ -783,9 +919,9 @@ class MochatChannel(BaseChannel):
         raw_body = normalize_mochat_content(payload.get("content")) or "[empty message]"
         ai = _safe_dict(payload.get("authorInfo"))
         sender_name = _str_field(ai, "nickname", "email")
-        sender_username = _str_field(ai, "agentId")
+        sender_username = _str_key(ai, "agentId")
 
-        group_id = _str_field(payload, "groupId")
+        group_id = _str_key(payload, "groupId")
         is_group = bool(group_id)
         was_mentioned = resolve_was_mentioned(payload, self.config.agent_user_id)
         require_mention = target_kind == "panel" and is_group and resolve_require_mention(self.config, target_id, group_id)
@@ -827,12 +963,20 @@ class MochatChannel(BaseChannel):
         state = self._delay_states.setdefault(key, DelayState())
         async with state.lock:
             state.entries.append(entry)
+            if state.flushing:
+                return  # 正在进行的flush会把它作为尾批发出
             if state.timer:
                 state.timer.cancel()
             state.timer = asyncio.create_task(self._delay_flush_after(key, target_id, target_kind))
 
     async def _delay_flush_after(self, key: str, target_id: str, target_kind: str) -> None:
-        await asyncio.sleep(max(0, self.config.reply_delay_ms) / 1000.0)
+        # 等待延迟到期或渠道停止，停止时所有定时器一起醒来并直接退出
+        try:
+            await asyncio.wait_for(self._delay_stopped.wait(),
+                                   timeout=max(0, self.config.reply_delay_ms) / 1000.0)
+            return
+        except asyncio.TimeoutError:
+            pass
         await self._flush_delayed_entries(key, target_id, target_kind, "timer", None)
 
     async def _flush_delayed_entries(self, key: str, target_id: str, target_kind: str, reason: str, entry: MochatBufferedEntry | None) -> None:
@@ -844,10 +988,31 @@ class MochatChannel(BaseChannel):
             if state.timer and state.timer is not current:
                 state.timer.cancel()
             state.timer = None
-            entries = state.entries[:]
-            state.entries.clear()
-        if entries:
+            entries, state.entries = state.entries, []
+            if not entries:
+                return
+            # 已有flush在分发时（如分发期间收到@提及），本次只发自己的批次，尾批仍由前者负责
+            owner = not state.flushing
+            state.flushing = True
+        try:
             await self._dispatch_entries(target_id, target_kind, entries, reason == "mention")
+            if not owner:
+                return
+
+            # 分发期间到达的条目没有起定时器，直接作为尾批发出，不再另等一轮延迟
+            for _ in range(MAX_TAIL_FLUSHES):
+                async with state.lock:
+                    if not state.entries:
+                        return
+                    entries, state.entries = state.entries, []
+                await self._dispatch_entries(target_id, target_kind, entries, False)
+        finally:
+            if owner:
+                async with state.lock:
+                    state.flushing = False
+                    # 尾批次数用尽后仍有剩余，交回定时器按正常延迟处理
+                    if state.entries and not state.timer and not self._delay_stopped.is_set():
+                        state.timer = asyncio.create_task(self._delay_flush_after(key, target_id, target_kind))
 
     async def _dispatch_entries(self, target_id: str, target_kind: str, entries: list[MochatBufferedEntry], was_mentioned: bool) -> None:
         if not entries:
@@ -867,19 +1032,25 @@ class MochatChannel(BaseChannel):
         )
 
     async def _cancel_delay_timers(self) -> None:
-        for state in self._delay_states.values():
-            if state.timer:
-                state.timer.cancel()
+        self._delay_stopped.set()
         self._delay_states.clear()
 
     # ---- notify handlers ---------------------------------------------------
 
     async def _handle_notify_chat_message(self, payload: Any) -> None:
-        if not isinstance(payload, dict):
+        payload = _as_dict(payload)
+        if payload is None:
+            return
+        # 固定键的热路径：直接内联查找，省去辅助函数调用
+        group_id = payload.get("groupId")
+        group_id = group_id.strip() if isinstance(group_id, str) else ""
+        if not group_id:
             return
-        group_id = _str_field(payload, "groupId")
-        panel_id = _str_field(payload, "converseId", "panelId")
-        if not group_id or not panel_id:
+        panel_id = payload.get("converseId")
+        if not isinstance(panel_id, str) or not (panel_id := panel_id.strip()):
+            panel_id = payload.get("panelId")
+            panel_id = panel_id.strip() if isinstance(panel_id, str) else ""
+        if not panel_id:
             return
         if self._panel_set and panel_id not in self._panel_set:
             return
@@ -894,20 +1065,23 @@ class MochatChannel(BaseChannel):
         await self._process_inbound_event(panel_id, evt, "panel")
 
     async def _handle_notify_inbox_append(self, payload: Any) -> None:
-        if not isinstance(payload, dict) or payload.get("type") != "message":
+        payload = _as_dict(payload)
+        if payload is None or payload.get("type") != "message":
             return
-        detail = payload.get("payload")
-        if not isinstance(detail, dict):
+        detail = _as_dict(payload.get("payload"))
+        if detail is None:
             return
-        if _str_field(detail, "groupId"):
+        group_id = detail.get("groupId")
+        if isinstance(group_id, str) and group_id.strip():
             return
-        converse_id = _str_field(detail, "converseId")
+        converse_id = detail.get("converseId")
+        converse_id = converse_id.strip() if isinstance(converse_id, str) else ""
         if not converse_id:
             return
 
         session_id = self._session_by_converse.get(converse_id)
         if not session_id:
-            await self._refresh_sessions_directory(self._ws_ready)
+            await self._refresh_sessions_directory_once()
             session_id = self._session_by_converse.get(converse_id)
         if not session_id:
             return
@@ -924,21 +1098,74 @@ class MochatChannel(BaseChannel):
     # ---- cursor persistence ------------------------------------------------
 
     def _mark_session_cursor(self, session_id: str, cursor: int) -> None:
-        if cursor < 0 or cursor < self._session_cursor.get(session_id, 0):
+        if cursor < 0 or cursor <= self._session_cursor.get(session_id, -1):
             return
+        is_new = session_id not in self._session_activity
         self._session_cursor[session_id] = cursor
-        if not self._cursor_save_task or self._cursor_save_task.done():
-            self._cursor_save_task = asyncio.create_task(self._save_cursor_debounced())
+        self._session_cursor.move_to_end(session_id)
+        self._touch_session(session_id)
+        self._cursor_unsaved = True
+        self._cursor_dirty.set()
+        if is_new:
+            self._trim_session_maps()
+
+    def _touch_session(self, session_id: str) -> None:
+        """把会话标记为最近活动。"""
+        self._session_activity[session_id] = None
+        self._session_activity.move_to_end(session_id)
+
+    def _trim_session_maps(self) -> None:
+        """
+        按LRU淘汰会话，限制内存和游标文件大小。
 
-    async def _save_cursor_debounced(self) -> None:
-        await asyncio.sleep(CURSOR_SAVE_DEBOUNCE_S)
-        await self._save_session_cursors()
+        跟踪中的会话（含自动发现的）按最近活动排序，超出上限时淘汰最久不活跃的，
+        同时停止watch并丢弃其游标和去重记录；配置中显式列出的会话不淘汰。
+        被淘汰的会话再次被发现时按冷会话处理，不会重放历史消息。
+        """
+        cap = self.config.max_cached_sessions
+        if cap <= 0:
+            return
+        excess = len(self._session_activity) - cap
+        if excess > 0:
+            stale = (sid for sid in self._session_activity if sid not in self._configured_sessions)
+            for sid in list(islice(stale, excess)):
+                self._forget_session(sid)
+        excess = len(self._session_by_converse) - cap
+        if excess > 0:
+            for cid in list(islice(self._session_by_converse, excess)):
+                del self._session_by_converse[cid]
+
+    def _forget_session(self, session_id: str) -> None:
+        """停止跟踪会话，并丢弃与它相关的状态。"""
+        self._session_activity.pop(session_id, None)
+        self._session_set.discard(session_id)
+        self._cold_sessions.discard(session_id)
+        if self._session_cursor.pop(session_id, None) is not None:
+            self._cursor_unsaved = True
+        key = f"session:{session_id}"
+        self._seen_set.pop(key, None)
+        self._seen_queue.pop(key, None)
+        lock = self._target_locks.get(key)
+        if lock and not lock.locked():
+            del self._target_locks[key]
+        task = self._session_fallback_tasks.pop(session_id, None)
+        if task and not task.done():
+            task.cancel()
+
+    async def _cursor_writer(self) -> None:
+        """常驻写入协程：把防抖窗口内的多次游标更新合并为一次落盘。"""
+        while True:
+            await self._cursor_dirty.wait()
+            await asyncio.sleep(CURSOR_SAVE_DEBOUNCE_S)
+            self._cursor_dirty.clear()
+            await self._save_session_cursors()
 
     async def _load_session_cursors(self) -> None:
         if not self._cursor_path.exists():
             return
         try:
-            data = json.loads(self._cursor_path.read_text("utf-8"))
+            raw = self._cursor_path.read_bytes()
+            data = fastjson.loads(raw)
         except Exception as e:
             logger.warning(f"Failed to read Mochat cursor file: {e}")
             return
@@ -947,30 +1174,52 @@ class MochatChannel(BaseChannel):
             for sid, cur in cursors.items():
                 if isinstance(sid, str) and isinstance(cur, int) and cur >= 0:
                     self._session_cursor[sid] = cur
+                    self._touch_session(sid)
+        self._trim_session_maps()
 
     async def _save_session_cursors(self) -> None:
+        async with self._cursor_save_lock:
+            # 自上次成功保存后游标没有推进，跳过序列化和写盘
+            if not self._cursor_unsaved:
+                return
+            self._cursor_unsaved = False
+            updated_at = datetime.now(timezone.utc)
+            try:
+                self._state_dir.mkdir(parents=True, exist_ok=True)
+                payload = fastjson.dumps_bytes({
+                    "schemaVersion": 1, "updatedAt": updated_at.isoformat(timespec="seconds"),
+                    "cursors": self._session_cursor,
+                }, indent=True, newline=True)
+                # fsync可能阻塞较久，放到线程池执行，避免卡住事件循环
+                await asyncio.to_thread(self._write_cursor_file, payload)
+            except Exception as e:
+                self._cursor_unsaved = True
+                logger.warning(f"Failed to save Mochat cursor file: {e}")
+
+    def _write_cursor_file(self, payload: bytes) -> None:
+        """先写临时文件并fsync，再原子替换，避免进程中断留下半截文件。"""
+        tmp_path = self._cursor_path.with_name(self._cursor_path.name + ".tmp")
         try:
-            self._state_dir.mkdir(parents=True, exist_ok=True)
-            self._cursor_path.write_text(json.dumps({
-                "schemaVersion": 1, "updatedAt": datetime.utcnow().isoformat(),
-                "cursors": self._session_cursor,
-            }, ensure_ascii=False, indent=2) + "\n", "utf-8")
-        except Exception as e:
-            logger.warning(f"Failed to save Mochat cursor file: {e}")
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._cursor_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
 
     # ---- HTTP helpers ------------------------------------------------------
 
     async def _post_json(self, path: str, payload: dict[str, Any]) -> dict[str, Any]:
         if not self._http:
             raise RuntimeError("Mochat HTTP client not initialized")
-        url = f"{self.config.base_url.strip().rstrip('/')}{path}"
-        response = await self._http.post(url, headers={
-            "Content-Type": "application/json", "X-Claw-Token": self.config.claw_token,
-        }, json=payload)
+        body = fastjson.dumps_bytes(payload)
+        response = await self._http.post(self._base_url + path, headers=self._post_headers, content=body)
         if not response.is_success:
-            raise RuntimeError(f"Mochat HTTP {response.status_code}: {response.text[:200]}")
+            raise MochatHTTPError(response.status_code, response.text[:200])
         try:
-            parsed = response.json()
+            parsed = fastjson.loads(response.content)
         except Exception:
             parsed = response.text
         if isinstance(parsed, dict) and isinstance(parsed.get("code"), int):
@@ -14,6 +14,7 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import QQConfig
+from nanobot.utils.fastjson import patch_module_json
 
 try:
     import botpy
@@ -28,6 +29,8 @@ except ImportError:
 if TYPE_CHECKING:
     from botpy.message import C2CMessage
 
+MAX_PROCESSED_IDS = 1000  # 去重窗口内保留的消息ID数量
+
 
 def _make_bot_class(channel: "QQChannel") -> "type[botpy.Client]":
     """
@@ -71,7 +74,8 @@ class QQChannel(BaseChannel):
         super().__init__(config, bus)
         self.config: QQConfig = config
         self._client: "botpy.Client | None" = None
-        self._processed_ids: deque = deque(maxlen=1000)
+        self._processed_ids: deque = deque(maxlen=MAX_PROCESSED_IDS)
+        self._processed_set: set[str] = set()
         self._bot_task: asyncio.Task | None = None
 
     async def start(self) -> None:
@@ -88,6 +92,13 @@ class QQChannel(BaseChannel):
             logger.error("QQ app_id and secret not configured")
             return
 
+        # 网关每个WebSocket帧都要JSON解码，让botpy改用orjson（未安装时保持标准库）
+        try:
+            import botpy.gateway
+            patch_module_json(botpy.gateway)
+        except Exception as e:
+            logger.debug(f"QQ orjson patch skipped: {e}")
+
         self._running = True
         BotClass = _make_bot_class(self)
         self._client = BotClass()
@@ -155,9 +166,12 @@ class QQChannel(BaseChannel):
         """
         try:
             # 按消息ID去重
-            if data.id in self._processed_ids:
+            if data.id in self._processed_set:
                 return
+            if len(self._processed_ids) == MAX_PROCESSED_IDS:
+                self._processed_set.discard(self._processed_ids[0])
             self._processed_ids.append(data.id)
+            self._processed_set.add(data.id)
 
             author = data.author
             user_id = str(getattr(author, 'id', None) or getattr(author, 'user_openid', 'unknown'))
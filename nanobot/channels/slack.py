@@ -18,6 +18,7 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import SlackConfig
+from nanobot.utils.fastjson import patch_module_json
 
 
 class SlackChannel(BaseChannel):
@@ -36,6 +37,10 @@ class SlackChannel(BaseChannel):
         self._web_client: AsyncWebClient | None = None
         self._socket_client: SocketModeClient | None = None
         self._bot_user_id: str | None = None
+        self._bot_mention_token: str | None = None
+        self._mention_re: re.Pattern[str] | None = None
+        self._stop_event = asyncio.Event()
+        self._bg_tasks: set[asyncio.Task] = set()
 
     async def start(self) -> None:
         """
@@ -51,6 +56,14 @@ class SlackChannel(BaseChannel):
             return
 
         self._running = True
+        self._stop_event.clear()
+
+        # Socket模式每一帧都要JSON解码，让SDK改用orjson（未安装时保持标准库）
+        try:
+            import slack_sdk.socket_mode.async_client as socket_mode_async
+            patch_module_json(socket_mode_async)
+        except Exception as e:
+            logger.debug(f"Slack orjson patch skipped: {e}")
 
         self._web_client = AsyncWebClient(token=self.config.bot_token)
         self._socket_client = SocketModeClient(
@@ -63,7 +76,7 @@ class SlackChannel(BaseChannel):
         # 解析机器人用户ID用于@提及处理
         try:
             auth = await self._web_client.auth_test()
-            self._bot_user_id = auth.get("user_id")
+            self._set_bot_user_id(auth.get("user_id"))
             logger.info(f"Slack bot connected as {self._bot_user_id}")
         except Exception as e:
             logger.warning(f"Slack auth_test failed: {e}")
@@ -71,8 +84,9 @@ class SlackChannel(BaseChannel):
         logger.info("Starting Slack Socket Mode client...")
         await self._socket_client.connect()
 
-        while self._running:
-            await asyncio.sleep(1)
+        # 挂起直到stop()被调用，避免每秒空转唤醒事件循环
+        if self._running:
+            await self._stop_event.wait()
 
     async def stop(self) -> None:
         """
@@ -81,6 +95,7 @@ class SlackChannel(BaseChannel):
         关闭Socket模式连接并清理资源。
         """
         self._running = False
+        self._stop_event.set()
         if self._socket_client:
             try:
                 await self._socket_client.close()
@@ -142,22 +157,22 @@ class SlackChannel(BaseChannel):
         if event_type not in ("message", "app_mention"):
             return
 
-        sender_id = event.get("user")
-        chat_id = event.get("channel")
-
         # 忽略机器人/系统消息（有subtype的通常不是普通用户消息）
         if event.get("subtype"):
             return
-        if self._bot_user_id and sender_id == self._bot_user_id:
-            return
 
         # 避免重复处理：Slack在频道中@机器人时会发送`message`和`app_mention`两种事件，
-        # 这里优先处理`app_mention`事件。
+        # 这里优先处理`app_mention`事件。约一半事件在此被丢弃，因此尽早判断。
         text = event.get("text") or ""
-        if event_type == "message" and self._bot_user_id and f"<@{self._bot_user_id}>" in text:
+        if event_type == "message" and self._bot_mention_token and self._bot_mention_token in text:
             return
 
-        # 调试：记录基本事件结构
+        sender_id = event.get("user")
+        if self._bot_user_id and sender_id == self._bot_user_id:
+            return
+        chat_id = event.get("channel")
+
+        # 调试：记录基本事件结构（参数都很廉价，直接传位置参数，由loguru在需要输出时再格式化）
         logger.debug(
             "Slack event: type={} subtype={} user={} channel={} channel_type={} text={}",
             event_type,
@@ -181,16 +196,11 @@ class SlackChannel(BaseChannel):
         text = self._strip_bot_mention(text)
 
         thread_ts = event.get("thread_ts") or event.get("ts")
-        # 为触发消息添加:eyes:表情（尽力而为，失败不会影响主流程）
-        try:
-            if self._web_client and event.get("ts"):
-                await self._web_client.reactions_add(
-                    channel=chat_id,
-                    name="eyes",
-                    timestamp=event.get("ts"),
-                )
-        except Exception as e:
-            logger.debug(f"Slack reactions_add failed: {e}")
+        # 为触发消息添加:eyes:表情（后台执行，不阻塞消息分发）
+        if self._web_client and event.get("ts"):
+            task = asyncio.create_task(self._safe_reactions_add(chat_id, event.get("ts")))
+            self._bg_tasks.add(task)
+            task.add_done_callback(self._bg_tasks.discard)
 
         await self._handle_message(
             sender_id=sender_id,
@@ -205,6 +215,14 @@ class SlackChannel(BaseChannel):
             },
         )
 
+    async def _safe_reactions_add(self, chat_id: str, ts: str) -> None:
+        """添加:eyes:表情，尽力而为，失败不会影响主流程。"""
+        try:
+            if self._web_client:
+                await self._web_client.reactions_add(channel=chat_id, name="eyes", timestamp=ts)
+        except Exception as e:
+            logger.debug(f"Slack reactions_add failed: {e}")
+
     def _is_allowed(self, sender_id: str, chat_id: str, channel_type: str) -> bool:
         if channel_type == "im":
             if not self.config.dm.enabled:
@@ -224,12 +242,18 @@ class SlackChannel(BaseChannel):
         if self.config.group_policy == "mention":
             if event_type == "app_mention":
                 return True
-            return self._bot_user_id is not None and f"<@{self._bot_user_id}>" in text
+            return self._bot_mention_token is not None and self._bot_mention_token in text
         if self.config.group_policy == "allowlist":
             return chat_id in self.config.group_allow_from
         return False
 
+    def _set_bot_user_id(self, user_id: str | None) -> None:
+        """记录机器人用户ID，并预先构建@提及标记和正则。"""
+        self._bot_user_id = user_id
+        self._bot_mention_token = f"<@{user_id}>" if user_id else None
+        self._mention_re = re.compile(rf"<@{re.escape(user_id)}>\s*") if user_id else None
+
     def _strip_bot_mention(self, text: str) -> str:
-        if not text or not self._bot_user_id:
+        if not text or not self._mention_re:
             return text
-        return re.sub(rf"<@{re.escape(self._bot_user_id)}>\s*", "", text).strip()
+        return self._mention_re.sub("", text).strip()
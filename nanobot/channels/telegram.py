@@ -12,6 +12,9 @@ from __future__ import annotations
 
 import asyncio
 import re
+from functools import lru_cache
+from html import escape as _html_escape
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 from loguru import logger
@@ -23,17 +26,110 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import TelegramConfig
+from nanobot.providers.transcription import GroqTranscriptionProvider
 
 if TYPE_CHECKING:
     from nanobot.session.manager import SessionManager
 
 
+# 打字循环空闲多久（秒）后自动退出
+TYPING_IDLE_TIMEOUT_S = 300.0
+
+# 媒体文件扩展名：优先按MIME类型，其次按媒体类型
+_MIME_EXT = {
+    "image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif",
+    "audio/ogg": ".ogg", "audio/mpeg": ".mp3", "audio/mp4": ".m4a",
+}
+_MEDIA_TYPE_EXT = {"image": ".jpg", "voice": ".ogg", "audio": ".mp3", "file": ""}
+
+# 粗体/删除线的内容：整体跨过行内代码（代码中的**、~~不会提前闭合），
+# 没有配对的孤立反引号按普通字符处理
+_MD_SPAN_BODY = r"(?:[^`\n]|`[^`]*`|`(?![^`]*`))+?"
+
+# 斜体的内容：不含"_"，行内代码整体跨过（代码中的"_"不会闭合斜体，也不会拆开代码）
+_MD_ITALIC_BODY = r"(?:[^_`]|`[^`]+`|`(?![^`]*`))+"
+
+# 单遍扫描的Markdown词法正则：每个分支对应一种结构，按优先级排列。
+# 代码块/行内代码优先匹配，其内容不会再被其他规则处理。
+_MD_TOKEN_RE = re.compile(
+    r'```[\w]*\n?(?P<cb>[\s\S]*?)```'                    # 代码块
+    r'|`(?P<ic>[^`]+)`'                                    # 行内代码
+    r'|^(?:#{1,6}\s+(?=.)(?:>\s*)?|>\s*)(?P<pb>[-*]\s+)?'  # 标题/引用前缀（可跟列表符号）
+    r'|^(?P<bul>[-*]\s+)'                                  # 项目符号
+    r'|\[(?P<lt>[^\]]+)\]\((?P<lu>[^)]+)\)'                # 链接
+    rf'|\*\*(?P<b1>{_MD_SPAN_BODY})\*\*'                   # 粗体 **text**
+    rf'|__(?P<b2>{_MD_SPAN_BODY})__'                       # 粗体 __text__
+    rf'|(?<![a-zA-Z0-9])_(?P<it>{_MD_ITALIC_BODY})_(?![a-zA-Z0-9_])'  # 斜体（不匹配单词内部）
+    rf'|~~(?P<st>{_MD_SPAN_BODY})~~',                      # 删除线
+    re.MULTILINE,
+)
+
+# 所有Markdown结构都以这些字符之一开头；不含它们的文本无需词法扫描
+_MD_META_RE = re.compile(r"[`*_~#>\[\-]")
+
+# 包裹型结构：分组名 -> (开标签, 闭标签)，内容递归渲染
+_MD_WRAP_TAGS = {
+    "b1": ("<b>", "</b>"),
+    "b2": ("<b>", "</b>"),
+    "it": ("<i>", "</i>"),
+    "st": ("<s>", "</s>"),
+}
+
+
+def _render_markdown(text: str, pos: int, endpos: int, out: list[str]) -> None:
+    """
+    单遍扫描text[pos:endpos]，把转换结果依次追加到out。
+
+    使用pos/endpos而非切片，使``^``只在真实行首匹配、斜体的前后断言能看到原文上下文。
+    """
+    # 链接文字、粗体等内层片段通常不含标记字符，直接转义即可，省去一次词法扫描
+    if not _MD_META_RE.search(text, pos, endpos):
+        out.append(_html_escape(text[pos:endpos], quote=False))
+        return
+    append = out.append  # 热循环中避免重复查找属性
+    last = pos
+    for m in _MD_TOKEN_RE.finditer(text, pos, endpos):
+        if m.start() > last:
+            append(_html_escape(text[last:m.start()], quote=False))
+        last = m.end()
+        kind = m.lastgroup
+        # 代码内容直接转义输出，不经过占位符替换
+        if kind == "cb":
+            append(f"<pre><code>{_html_escape(m.group('cb'), quote=False)}</code></pre>")
+        elif kind == "ic":
+            append(f"<code>{_html_escape(m.group('ic'), quote=False)}</code>")
+        elif kind == "lu":
+            append(f'<a href="{_html_escape(m.group("lu"), quote=False)}">')
+            _render_markdown(text, m.start("lt"), m.end("lt"), out)
+            append("</a>")
+        elif kind in _MD_WRAP_TAGS:
+            open_tag, close_tag = _MD_WRAP_TAGS[kind]
+            append(open_tag)
+            _render_markdown(text, m.start(kind), m.end(kind), out)
+            append(close_tag)
+        elif kind == "bul" or kind == "pb":
+            append("• ")
+        # 其余情况是标题/引用前缀，直接丢弃
+    if last < endpos:
+        append(_html_escape(text[last:endpos], quote=False))
+
+
+@lru_cache(maxsize=512)
+def _render_markdown_cached(text: str) -> str:
+    """渲染整段Markdown。转换是纯函数，结果按输入文本做LRU缓存。"""
+    parts: list[str] = []
+    _render_markdown(text, 0, len(text), parts)
+    return "".join(parts)
+
+
 def _markdown_to_telegram_html(text: str) -> str:
     """
     将Markdown转换为Telegram安全的HTML格式。
     
     Telegram支持有限的HTML标签，此函数将Markdown语法转换为
     Telegram可以理解的HTML格式，同时保护代码块和行内代码不被转换。
+    所有结构在一次正则扫描中识别并直接输出，不再逐个规则重写整段文本。
+    不含任何Markdown标记字符的纯文本只做转义，也不占用渲染缓存。
     
     Args:
         text: Markdown格式的文本
@@ -43,61 +139,15 @@ def _markdown_to_telegram_html(text: str) -> str:
     """
     if not text:
         return ""
-    
-    # 1. 提取并保护代码块（避免内容被其他处理影响）
-    code_blocks: list[str] = []
-    def save_code_block(m: re.Match) -> str:
-        code_blocks.append(m.group(1))
-        return f"\x00CB{len(code_blocks) - 1}\x00"
-    
-    text = re.sub(r'```[\w]*\n?([\s\S]*?)```', save_code_block, text)
-    
-    # 2. 提取并保护行内代码
-    inline_codes: list[str] = []
-    def save_inline_code(m: re.Match) -> str:
-        inline_codes.append(m.group(1))
-        return f"\x00IC{len(inline_codes) - 1}\x00"
-    
-    text = re.sub(r'`([^`]+)`', save_inline_code, text)
-    
-    # 3. 标题 # Title -> 只保留标题文本
-    text = re.sub(r'^#{1,6}\s+(.+)$', r'\1', text, flags=re.MULTILINE)
-    
-    # 4. 引用块 > text -> 只保留文本（在HTML转义之前）
-    text = re.sub(r'^>\s*(.*)$', r'\1', text, flags=re.MULTILINE)
-    
-    # 5. 转义HTML特殊字符
-    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-    
-    # 6. 链接 [text](url) - 必须在粗体/斜体之前处理，以处理嵌套情况
-    text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2">\1</a>', text)
-    
-    # 7. 粗体 **text** 或 __text__
-    text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-    text = re.sub(r'__(.+?)__', r'<b>\1</b>', text)
-    
-    # 8. 斜体 _text_（避免匹配单词内部，如some_var_name）
-    text = re.sub(r'(?<![a-zA-Z0-9])_([^_]+)_(?![a-zA-Z0-9])', r'<i>\1</i>', text)
-    
-    # 9. 删除线 ~~text~~
-    text = re.sub(r'~~(.+?)~~', r'<s>\1</s>', text)
-    
-    # 10. 项目符号列表 - item -> • item
-    text = re.sub(r'^[-*]\s+', '• ', text, flags=re.MULTILINE)
-    
-    # 11. 恢复行内代码并添加HTML标签
-    for i, code in enumerate(inline_codes):
-        # 转义代码内容中的HTML
-        escaped = code.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        text = text.replace(f"\x00IC{i}\x00", f"<code>{escaped}</code>")
-    
-    # 12. 恢复代码块并添加HTML标签
-    for i, code in enumerate(code_blocks):
-        # 转义代码内容中的HTML
-        escaped = code.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        text = text.replace(f"\x00CB{i}\x00", f"<pre><code>{escaped}</code></pre>")
-    
-    return text
+    if not _MD_META_RE.search(text):
+        return _html_escape(text, quote=False)
+    return _render_markdown_cached(text)
+
+
+@lru_cache(maxsize=1024)
+def _parse_chat_id(chat_id: str) -> int:
+    """将字符串形式的聊天ID解析为整数。同一聊天反复出现，结果做LRU缓存。"""
+    return int(chat_id)
 
 
 class TelegramChannel(BaseChannel):
@@ -127,10 +177,15 @@ class TelegramChannel(BaseChannel):
         super().__init__(config, bus)
         self.config: TelegramConfig = config
         self.groq_api_key = groq_api_key
+        # 共享的转录提供者；未传入密钥时仍会回退到GROQ_API_KEY环境变量
+        self._transcriber = GroqTranscriptionProvider(api_key=groq_api_key)
         self.session_manager = session_manager
         self._app: Application | None = None
         self._chat_ids: dict[str, int] = {}  # Map sender_id to chat_id for replies
-        self._typing_tasks: dict[str, asyncio.Task] = {}  # chat_id -> typing loop task
+        self._typing_tasks: dict[str, asyncio.Task] = {}  # chat_id -> 常驻的打字循环任务
+        self._typing_events: dict[str, asyncio.Event] = {}  # chat_id -> 是否需要显示"正在输入"
+        self._stop_event = asyncio.Event()
+        self._media_dir = Path.home() / ".nanobot" / "media"  # 媒体下载目录，在start()中创建
     
     async def start(self) -> None:
         """
@@ -144,12 +199,29 @@ class TelegramChannel(BaseChannel):
             return
         
         self._running = True
-        
-        # 构建应用程序，使用更大的连接池以避免长时间运行时的池超时
-        req = HTTPXRequest(connection_pool_size=16, pool_timeout=5.0, connect_timeout=30.0, read_timeout=30.0)
-        builder = Application.builder().token(self.config.token).request(req).get_updates_request(req)
-        if self.config.proxy:
-            builder = builder.proxy(self.config.proxy).get_updates_proxy(self.config.proxy)
+        self._stop_event.clear()
+        self._media_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 构建应用程序。普通API调用（发送消息、打字指示等）使用HTTP/2连接池，
+        # 并发请求可在同一TLS连接上多路复用；长轮询getUpdates单独使用一个连接，
+        # 避免长时间挂起的请求占用发送消息的连接池。
+        proxy = self.config.proxy or None
+        req = HTTPXRequest(
+            connection_pool_size=32,
+            pool_timeout=10.0,
+            connect_timeout=30.0,
+            read_timeout=30.0,
+            http_version="2",
+            proxy=proxy,
+        )
+        updates_req = HTTPXRequest(
+            connection_pool_size=1,
+            pool_timeout=10.0,
+            connect_timeout=30.0,
+            read_timeout=30.0,
+            proxy=proxy,
+        )
+        builder = Application.builder().token(self.config.token).request(req).get_updates_request(updates_req)
         self._app = builder.build()
         self._app.add_error_handler(self._on_error)
         
@@ -184,14 +256,18 @@ class TelegramChannel(BaseChannel):
             logger.warning(f"Failed to register bot commands: {e}")
         
         # 开始轮询（持续运行直到停止）
+        # 长轮询：服务端最多挂起50秒，有新消息立即返回，空闲时大幅减少getUpdates调用。
+        # PTB会把该值叠加到读超时上；代价是连接被中间设备静默断开时需要更久才能发现。
         await self._app.updater.start_polling(
+            poll_interval=0.0,
+            timeout=50,
             allowed_updates=["message"],
             drop_pending_updates=True  # 启动时忽略旧消息
         )
         
-        # 保持运行直到停止
-        while self._running:
-            await asyncio.sleep(1)
+        # 挂起直到stop()被调用，避免每秒空转唤醒事件循环
+        if self._running:
+            await self._stop_event.wait()
     
     async def stop(self) -> None:
         """
@@ -200,10 +276,15 @@ class TelegramChannel(BaseChannel):
         取消所有打字指示器，停止轮询，并清理资源。
         """
         self._running = False
+        self._stop_event.set()
+        
+        # 取消所有打字循环任务
+        for task in self._typing_tasks.values():
+            task.cancel()
+        self._typing_tasks.clear()
+        self._typing_events.clear()
         
-        # 取消所有打字指示器
-        for chat_id in list(self._typing_tasks):
-            self._stop_typing(chat_id)
+        await self._transcriber.close()
         
         if self._app:
             logger.info("Stopping Telegram bot...")
@@ -229,9 +310,14 @@ class TelegramChannel(BaseChannel):
         # 停止此聊天的打字指示器
         self._stop_typing(msg.chat_id)
         
+        # chat_id应该是Telegram聊天ID（整数），只解析一次，回退路径复用
+        try:
+            chat_id = _parse_chat_id(msg.chat_id)
+        except ValueError:
+            logger.error(f"Invalid chat_id: {msg.chat_id}")
+            return
+        
         try:
-            # chat_id应该是Telegram聊天ID（整数）
-            chat_id = int(msg.chat_id)
             # 将Markdown转换为Telegram HTML
             html_content = _markdown_to_telegram_html(msg.content)
             await self._app.bot.send_message(
@@ -239,14 +325,12 @@ class TelegramChannel(BaseChannel):
                 text=html_content,
                 parse_mode="HTML"
             )
-        except ValueError:
-            logger.error(f"Invalid chat_id: {msg.chat_id}")
         except Exception as e:
             # 如果HTML解析失败，回退到纯文本
             logger.warning(f"HTML parse failed, falling back to plain text: {e}")
             try:
                 await self._app.bot.send_message(
-                    chat_id=int(msg.chat_id),
+                    chat_id=chat_id,
                     text=msg.content
                 )
             except Exception as e2:
@@ -286,9 +370,9 @@ class TelegramChannel(BaseChannel):
             return
         
         session = self.session_manager.get_or_create(session_key)
-        msg_count = len(session.messages)
+        msg_count = session.total_messages
         session.clear()
-        self.session_manager.save(session)
+        await self.session_manager.asave(session)
         
         logger.info(f"Session reset for {session_key} (cleared {msg_count} messages)")
         await update.message.reply_text("🔄 Conversation history cleared. Let's start fresh!")
@@ -372,21 +456,15 @@ class TelegramChannel(BaseChannel):
                 file = await self._app.bot.get_file(media_file.file_id)
                 ext = self._get_extension(media_type, getattr(media_file, 'mime_type', None))
                 
-                # 保存到工作空间/media/目录
-                from pathlib import Path
-                media_dir = Path.home() / ".nanobot" / "media"
-                media_dir.mkdir(parents=True, exist_ok=True)
-                
-                file_path = media_dir / f"{media_file.file_id[:16]}{ext}"
+                # 保存到~/.nanobot/media/目录
+                file_path = self._media_dir / f"{media_file.file_id[:16]}{ext}"
                 await file.download_to_drive(str(file_path))
                 
                 media_paths.append(str(file_path))
                 
                 # 处理语音转文字
                 if media_type == "voice" or media_type == "audio":
-                    from nanobot.providers.transcription import GroqTranscriptionProvider
-                    transcriber = GroqTranscriptionProvider(api_key=self.groq_api_key)
-                    transcription = await transcriber.transcribe(file_path)
+                    transcription = await self._transcriber.transcribe(file_path)
                     if transcription:
                         logger.info(f"Transcribed {media_type}: {transcription[:50]}...")
                         content_parts.append(f"[transcription: {transcription}]")
@@ -428,12 +506,20 @@ class TelegramChannel(BaseChannel):
         """
         开始为聊天发送"正在输入..."指示器。
         
+        每个聊天只有一个常驻的打字循环任务，这里仅置位其事件，
+        避免连续消息时反复取消和创建任务。
+        
         Args:
             chat_id: 聊天ID
         """
-        # 取消此聊天的任何现有打字任务
-        self._stop_typing(chat_id)
-        self._typing_tasks[chat_id] = asyncio.create_task(self._typing_loop(chat_id))
+        event = self._typing_events.get(chat_id)
+        task = self._typing_tasks.get(chat_id)
+        if event is None or task is None or task.done():
+            # 仅在没有存活的循环任务时才创建（例如任务被外部取消后），否则复用现有任务
+            event = asyncio.Event()
+            self._typing_events[chat_id] = event
+            self._typing_tasks[chat_id] = asyncio.create_task(self._typing_loop(chat_id, event))
+        event.set()
     
     def _stop_typing(self, chat_id: str) -> None:
         """
@@ -442,27 +528,41 @@ class TelegramChannel(BaseChannel):
         Args:
             chat_id: 聊天ID
         """
-        task = self._typing_tasks.pop(chat_id, None)
-        if task and not task.done():
-            task.cancel()
+        event = self._typing_events.get(chat_id)
+        if event:
+            event.clear()
     
-    async def _typing_loop(self, chat_id: str) -> None:
+    async def _typing_loop(self, chat_id: str, event: asyncio.Event) -> None:
         """
-        重复发送"正在输入"动作，直到被取消。
+        事件置位期间每4秒发送一次"正在输入"动作。
         
-        每4秒发送一次打字动作，直到任务被取消。
+        事件清除后挂起等待下一次置位；空闲超过TYPING_IDLE_TIMEOUT_S后
+        自行退出并移除登记，避免不活跃的聊天一直占用任务。
         
         Args:
             chat_id: 聊天ID
+            event: 该聊天的打字事件
         """
         try:
             while self._app:
-                await self._app.bot.send_chat_action(chat_id=int(chat_id), action="typing")
+                if not event.is_set():
+                    try:
+                        await asyncio.wait_for(event.wait(), timeout=TYPING_IDLE_TIMEOUT_S)
+                    except asyncio.TimeoutError:
+                        if event.is_set():
+                            continue
+                        break
+                try:
+                    await self._app.bot.send_chat_action(chat_id=_parse_chat_id(chat_id), action="typing")
+                except Exception as e:
+                    logger.debug(f"Typing indicator failed for {chat_id}: {e}")
                 await asyncio.sleep(4)
         except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            logger.debug(f"Typing indicator stopped for {chat_id}: {e}")
+            return
+        # 正常退出时注销自己（stop()取消任务时已统一清理）
+        if self._typing_events.get(chat_id) is event:
+            del self._typing_events[chat_id]
+            self._typing_tasks.pop(chat_id, None)
     
     async def _on_error(self, update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
@@ -485,13 +585,4 @@ class TelegramChannel(BaseChannel):
         Returns:
             文件扩展名
         """
-        if mime_type:
-            ext_map = {
-                "image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif",
-                "audio/ogg": ".ogg", "audio/mpeg": ".mp3", "audio/mp4": ".m4a",
-            }
-            if mime_type in ext_map:
-                return ext_map[mime_type]
-        
-        type_map = {"image": ".jpg", "voice": ".ogg", "audio": ".mp3", "file": ""}
-        return type_map.get(media_type, "")
+        return _MIME_EXT.get(mime_type) or _MEDIA_TYPE_EXT.get(media_type, "")
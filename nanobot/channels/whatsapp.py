@@ -15,6 +15,11 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import WhatsAppConfig
+from nanobot.utils import fastjson
+
+# 处理桥接消息的工作协程数量，以及每个工作队列的容量（满时对WebSocket读取形成背压）
+BRIDGE_WORKER_COUNT = 4
+BRIDGE_QUEUE_SIZE = 64
 
 
 class WhatsAppChannel(BaseChannel):
@@ -63,12 +68,26 @@ class WhatsAppChannel(BaseChannel):
                     self._connected = True
                     logger.info("Connected to WhatsApp bridge")
                     
-                    # 监听消息
-                    async for message in ws:
-                        try:
-                            await self._handle_bridge_message(message)
-                        except Exception as e:
-                            logger.error(f"Error handling bridge message: {e}")
+                    # 读取循环只负责解码并入队，消息处理交给工作协程，避免阻塞socket
+                    queues = [asyncio.Queue(maxsize=BRIDGE_QUEUE_SIZE) for _ in range(BRIDGE_WORKER_COUNT)]
+                    workers = [asyncio.create_task(self._bridge_worker(q)) for q in queues]
+                    try:
+                        async for message in ws:
+                            data = self._decode_bridge_frame(message)
+                            if data is None:
+                                continue
+                            if data.get("type") != "message":
+                                # 状态/二维码/错误通知开销很小，直接处理以保持即时性
+                                await self._handle_bridge_data(data)
+                                continue
+                            # 按发送者分片，保证同一聊天的消息按到达顺序处理
+                            shard = hash(data.get("sender") or "") % BRIDGE_WORKER_COUNT
+                            await queues[shard].put(data)
+                    finally:
+                        for task in workers:
+                            task.cancel()
+                        # 等待工作协程真正退出，避免重连后旧worker仍在处理消息
+                        await asyncio.gather(*workers, return_exceptions=True)
                     
             except asyncio.CancelledError:
                 break
@@ -111,29 +130,58 @@ class WhatsAppChannel(BaseChannel):
                 "to": msg.chat_id,
                 "text": msg.content
             }
-            await self._ws.send(json.dumps(payload))
+            # 直接产出UTF-8字节，作为二进制帧发送；桥接端按Buffer.toString()解析
+            await self._ws.send(fastjson.dumps_bytes(payload))
         except Exception as e:
             logger.error(f"Error sending WhatsApp message: {e}")
     
-    async def _handle_bridge_message(self, raw: str) -> None:
+    async def _bridge_worker(self, queue: asyncio.Queue) -> None:
+        """
+        从工作队列中依次取出桥接消息并处理。
+        
+        Args:
+            queue: 该工作协程负责的消息队列
+        """
+        while True:
+            data = await queue.get()
+            try:
+                await self._handle_bridge_data(data)
+            except Exception as e:
+                logger.error(f"Error handling bridge message: {e}")
+    
+    def _decode_bridge_frame(self, raw: str | bytes) -> dict[str, Any] | None:
+        """
+        解析桥接发送的JSON帧。
+        
+        Args:
+            raw: 原始JSON字符串或字节串
+        
+        Returns:
+            解析后的消息字典，无效帧返回None
+        """
+        try:
+            data = fastjson.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid JSON from bridge: {raw[:100]}")
+            return None
+        if not isinstance(data, dict):
+            logger.warning(f"Unexpected bridge frame: {raw[:100]}")
+            return None
+        return data
+    
+    async def _handle_bridge_data(self, data: dict[str, Any]) -> None:
         """
         处理来自桥接的消息。
         
-        解析桥接发送的JSON消息，根据消息类型进行处理：
+        根据消息类型进行处理：
         - message: 来自WhatsApp的消息
         - status: 连接状态更新
         - qr: QR码认证
         - error: 错误信息
         
         Args:
-            raw: 原始JSON字符串
+            data: 已解析的消息字典
         """
-        try:
-            data = json.loads(raw)
-        except json.JSONDecodeError:
-            logger.warning(f"Invalid JSON from bridge: {raw[:100]}")
-            return
-        
         msg_type = data.get("type")
         
         if msg_type == "message":
@@ -146,7 +194,8 @@ class WhatsAppChannel(BaseChannel):
             
             # 提取电话号码或LID作为chat_id
             user_id = pn if pn else sender
-            sender_id = user_id.split("@")[0] if "@" in user_id else user_id
+            at = user_id.find("@")
+            sender_id = user_id if at == -1 else user_id[:at]
             logger.info(f"Sender {sender}")
             
             # 如果是语音消息，处理语音转文字
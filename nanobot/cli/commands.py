@@ -349,7 +349,7 @@ def _make_provider(config):
         typer.Exit: 如果未配置API密钥
     """
     from nanobot.providers.litellm_provider import LiteLLMProvider
-    p = config.get_provider()
+    p, provider_name, api_base = config.resolve_provider()
     model = config.agents.defaults.model
     if not (p and p.api_key) and not model.startswith("bedrock/"):
         console.print("[red]Error: No API key configured.[/red]")
@@ -357,10 +357,10 @@ def _make_provider(config):
         raise typer.Exit(1)
     return LiteLLMProvider(
         api_key=p.api_key if p else None,
-        api_base=config.get_api_base(),
+        api_base=api_base,
         default_model=model,
         extra_headers=p.extra_headers if p else None,
-        provider_name=config.get_provider_name(),
+        provider_name=provider_name,
     )
 
 
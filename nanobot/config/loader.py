@@ -6,10 +6,16 @@
 """
 
 import json
+import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 from nanobot.config.schema import Config
+from nanobot.utils import fastjson
+
+# 匹配非首字符的大写字母之前的位置，用于camelCase拆分
+_CAMEL_SPLIT_RE = re.compile(r"(?<!^)(?=[A-Z])")
 
 
 def get_config_path() -> Path:
@@ -51,8 +57,7 @@ def load_config(config_path: Path | None = None) -> Config:
     
     if path.exists():
         try:
-            with open(path) as f:
-                data = json.load(f)
+            data = fastjson.loads(path.read_bytes())
             data = _migrate_config(data)
             return Config.model_validate(convert_keys(data))
         except (json.JSONDecodeError, ValueError) as e:
@@ -79,8 +84,7 @@ def save_config(config: Config, config_path: Path | None = None) -> None:
     data = config.model_dump()
     data = convert_to_camel(data)
     
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    path.write_bytes(fastjson.dumps_bytes(data, indent=True))
 
 
 def _migrate_config(data: dict) -> dict:
@@ -143,32 +147,33 @@ def convert_to_camel(data: Any) -> Any:
     return data
 
 
+@lru_cache(maxsize=2048)
 def camel_to_snake(name: str) -> str:
     """
     将camelCase转换为snake_case。
     
     例如：restrictToWorkspace -> restrict_to_workspace
     
+    配置键名集合很小且反复出现，结果做LRU缓存。
+    
     Args:
         name: camelCase字符串
     
     Returns:
         snake_case字符串
     """
-    result = []
-    for i, char in enumerate(name):
-        if char.isupper() and i > 0:
-            result.append("_")
-        result.append(char.lower())
-    return "".join(result)
+    return _CAMEL_SPLIT_RE.sub("_", name).lower()
 
 
+@lru_cache(maxsize=2048)
 def snake_to_camel(name: str) -> str:
     """
     将snake_case转换为camelCase。
     
     例如：restrict_to_workspace -> restrictToWorkspace
     
+    配置键名集合很小且反复出现，结果做LRU缓存。
+    
     Args:
         name: snake_case字符串
     
@@ -10,10 +10,17 @@
 所有配置类都继承自Pydantic的BaseModel，提供类型验证和自动文档生成。
 """
 
+import sys
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
+from typing import Annotated, NamedTuple
+
+from pydantic import AfterValidator, BaseModel, Field, ConfigDict, PrivateAttr
 from pydantic_settings import BaseSettings
 
+# 取值来自很小固定集合的字符串（模式、策略等）。加载时驻留，
+# 与代码中的字面量比较时可直接命中指针相等的快速路径。
+InternedStr = Annotated[str, AfterValidator(sys.intern)]
+
 
 class WhatsAppConfig(BaseModel):
     """WhatsApp渠道配置。"""
@@ -113,6 +120,8 @@ class MochatConfig(BaseModel):
     watch_limit: int = 100
     retry_delay_ms: int = 500
     max_retry_attempts: int = 0  # 0 means unlimited retries
+    batch_fallback_watch: bool = False  # Poll all sessions via one watchAll request in fallback mode
+    max_cached_sessions: int = 10000  # LRU cap for tracked sessions, converse->session and cursor maps (0 = unbounded)
     claw_token: str = ""
     agent_user_id: str = ""
     sessions: list[str] = Field(default_factory=list)
@@ -120,26 +129,26 @@ class MochatConfig(BaseModel):
     allow_from: list[str] = Field(default_factory=list)
     mention: MochatMentionConfig = Field(default_factory=MochatMentionConfig)
     groups: dict[str, MochatGroupRule] = Field(default_factory=dict)
-    reply_delay_mode: str = "non-mention"  # off | non-mention
+    reply_delay_mode: InternedStr = "non-mention"  # off | non-mention
     reply_delay_ms: int = 120000
 
 
 class SlackDMConfig(BaseModel):
     """Slack DM policy configuration."""
     enabled: bool = True
-    policy: str = "open"  # "open" or "allowlist"
+    policy: InternedStr = "open"  # "open" or "allowlist"
     allow_from: list[str] = Field(default_factory=list)  # Allowed Slack user IDs
 
 
 class SlackConfig(BaseModel):
     """Slack channel configuration."""
     enabled: bool = False
-    mode: str = "socket"  # "socket" supported
+    mode: InternedStr = "socket"  # "socket" supported
     webhook_path: str = "/slack/events"
     bot_token: str = ""  # xoxb-...
     app_token: str = ""  # xapp-...
     user_token_read_only: bool = True
-    group_policy: str = "mention"  # "mention", "open", "allowlist"
+    group_policy: InternedStr = "mention"  # "mention", "open", "allowlist"
     group_allow_from: list[str] = Field(default_factory=list)  # Allowed channel IDs if allowlist
     dm: SlackDMConfig = Field(default_factory=SlackDMConfig)
 
@@ -202,6 +211,13 @@ class ProvidersConfig(BaseModel):
     aihubmix: ProviderConfig = Field(default_factory=ProviderConfig)  # AiHubMix API网关
 
 
+class ProviderMatch(NamedTuple):
+    """一次提供者匹配的完整结果。"""
+    provider: ProviderConfig | None  # 匹配到的提供者配置
+    name: str | None  # 提供者的注册表名称
+    api_base: str | None  # 生效的API基础URL
+
+
 class GatewayConfig(BaseModel):
     """网关/服务器配置。"""
     host: str = "0.0.0.0"  # 监听地址
@@ -252,15 +268,24 @@ class Config(BaseSettings):
     proxy: ProxyConfig = Field(default_factory=ProxyConfig)  # 全局代理（可选）
     tools: ToolsConfig = Field(default_factory=ToolsConfig)  # 工具配置
     
+    # (原始workspace字符串, 展开后的路径)，字符串未变时复用
+    _workspace_cache: tuple[str, Path] | None = PrivateAttr(default=None)
+    
     @property
     def workspace_path(self) -> Path:
         """
         获取展开后的工作空间路径。
         
+        展开结果会被缓存；如果agents.defaults.workspace被修改，会自动重新计算。
+        
         Returns:
             工作空间路径
         """
-        return Path(self.agents.defaults.workspace).expanduser()
+        raw = self.agents.defaults.workspace
+        cached = self._workspace_cache
+        if cached is None or cached[0] != raw:
+            cached = self._workspace_cache = (raw, Path(raw).expanduser())
+        return cached[1]
     
     def _match_provider(self, model: str | None = None) -> tuple["ProviderConfig | None", str | None]:
         """
@@ -350,18 +375,33 @@ class Config(BaseSettings):
         Returns:
             API基础URL，如果未找到则返回None
         """
+        return self.resolve_provider(model).api_base
+    
+    def resolve_provider(self, model: str | None = None) -> ProviderMatch:
+        """
+        一次性解析提供者配置、注册表名称和API基础URL。
+        
+        需要同时用到多项结果时（如创建LLM提供者），调用此方法只做一次匹配，
+        而不是分别调用get_provider/get_provider_name/get_api_base。
+        
+        Args:
+            model: 模型名称，如果为None则使用默认模型
+        
+        Returns:
+            提供者匹配结果
+        """
         from nanobot.providers.registry import find_by_name
         p, name = self._match_provider(model)
         if p and p.api_base:
-            return p.api_base
+            return ProviderMatch(p, name, p.api_base)
         # 只有网关会在这里获得默认api_base。标准提供者
         # （如Moonshot）通过环境变量在_setup_env中设置其基础URL，
         # 以避免污染全局的litellm.api_base。
         if name:
             spec = find_by_name(name)
             if spec and spec.is_gateway and spec.default_api_base:
-                return spec.default_api_base
-        return None
+                return ProviderMatch(p, name, spec.default_api_base)
+        return ProviderMatch(p, name, None)
     
     model_config = ConfigDict(
         env_prefix="NANOBOT_",
@@ -10,6 +10,7 @@
 
 import asyncio
 import json
+import sys
 import time
 import uuid
 from datetime import datetime
@@ -47,11 +48,47 @@ def _now_ms() -> int:
     return int(time.time() * 1000)
 
 
+def _next_run_at(schedule: CronSchedule, now_ms: int) -> int | None:
+    """一次性任务：如果指定时间已过则不再执行。"""
+    return schedule.at_ms if schedule.at_ms and schedule.at_ms > now_ms else None
+
+
+def _next_run_every(schedule: CronSchedule, now_ms: int) -> int | None:
+    """周期性任务：从当前时间开始，每隔指定间隔执行。"""
+    if not schedule.every_ms or schedule.every_ms <= 0:
+        return None
+    return now_ms + schedule.every_ms
+
+
+def _next_run_cron(schedule: CronSchedule, now_ms: int) -> int | None:
+    """Cron表达式任务：在指定时区（或本地时区）下用 croniter 计算下次执行时间。"""
+    if not schedule.expr:
+        return None
+    try:
+        from croniter import croniter
+        tz = _cron_timezone(schedule)
+        now_sec = now_ms / 1000.0
+        start_dt = datetime.fromtimestamp(now_sec, tz=tz)
+        cron = croniter(schedule.expr, start_dt)
+        next_time = cron.get_next(float)
+        return int(next_time * 1000)
+    except Exception:
+        return None
+
+
+# 调度类型 -> 下次运行时间的计算函数
+_NEXT_RUN_BY_KIND: dict[str, Callable[[CronSchedule, int], int | None]] = {
+    "at": _next_run_at,
+    "every": _next_run_every,
+    "cron": _next_run_cron,
+}
+
+
 def _compute_next_run(schedule: CronSchedule, now_ms: int) -> int | None:
     """
     计算下次运行时间（毫秒）。
     
-    根据调度类型计算任务的下次执行时间。
+    根据调度类型分派到对应的计算函数。
     
     Args:
         schedule: 调度定义
@@ -60,30 +97,8 @@ def _compute_next_run(schedule: CronSchedule, now_ms: int) -> int | None:
     Returns:
         下次运行时间（毫秒），如果无法计算则返回None
     """
-    if schedule.kind == "at":
-        # 一次性任务：如果指定时间已过则不再执行
-        return schedule.at_ms if schedule.at_ms and schedule.at_ms > now_ms else None
-    
-    if schedule.kind == "every":
-        # 周期性任务：从当前时间开始，每隔指定间隔执行
-        if not schedule.every_ms or schedule.every_ms <= 0:
-            return None
-        return now_ms + schedule.every_ms
-    
-    if schedule.kind == "cron" and schedule.expr:
-        # Cron表达式任务：在指定时区（或本地时区）下用 croniter 计算下次执行时间
-        try:
-            from croniter import croniter
-            tz = _cron_timezone(schedule)
-            now_sec = now_ms / 1000.0
-            start_dt = datetime.fromtimestamp(now_sec, tz=tz)
-            cron = croniter(schedule.expr, start_dt)
-            next_time = cron.get_next(float)
-            return int(next_time * 1000)
-        except Exception:
-            return None
-    
-    return None
+    compute = _NEXT_RUN_BY_KIND.get(schedule.kind)
+    return compute(schedule, now_ms) if compute else None
 
 
 class CronService:
@@ -123,14 +138,14 @@ class CronService:
                         name=j["name"],
                         enabled=j.get("enabled", True),
                         schedule=CronSchedule(
-                            kind=j["schedule"]["kind"],
+                            kind=sys.intern(j["schedule"]["kind"]),
                             at_ms=j["schedule"].get("atMs"),
                             every_ms=j["schedule"].get("everyMs"),
                             expr=j["schedule"].get("expr"),
                             tz=j["schedule"].get("tz"),
                         ),
                         payload=CronPayload(
-                            kind=j["payload"].get("kind", "agent_turn"),
+                            kind=sys.intern(j["payload"].get("kind", "agent_turn")),
                             message=j["payload"].get("message", ""),
                             deliver=j["payload"].get("deliver", False),
                             channel=j["payload"].get("channel"),
@@ -12,7 +12,7 @@ from dataclasses import dataclass, field
 from typing import Literal
 
 
-@dataclass
+@dataclass(slots=True)
 class CronSchedule:
     """
     定时任务的调度定义。
@@ -29,7 +29,7 @@ class CronSchedule:
     tz: str | None = None  # cron表达式使用的时区
 
 
-@dataclass
+@dataclass(slots=True)
 class CronPayload:
     """
     任务执行时的内容定义。
@@ -43,7 +43,7 @@ class CronPayload:
     to: str | None = None  # 目标接收者，例如电话号码
 
 
-@dataclass
+@dataclass(slots=True)
 class CronJobState:
     """
     任务的运行时状态。
@@ -56,7 +56,7 @@ class CronJobState:
     last_error: str | None = None  # 上次执行错误信息（如果有）
 
 
-@dataclass
+@dataclass(slots=True)
 class CronJob:
     """
     定时任务。
@@ -74,7 +74,7 @@ class CronJob:
     delete_after_run: bool = False  # 执行后是否删除（用于一次性任务）
 
 
-@dataclass
+@dataclass(slots=True)
 class CronStore:
     """
     定时任务的持久化存储。
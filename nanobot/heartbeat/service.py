@@ -5,6 +5,8 @@
 """
 
 import asyncio
+import os
+import re
 from pathlib import Path
 from typing import Any, Callable, Coroutine
 
@@ -21,6 +23,16 @@ If nothing needs attention, reply with just: HEARTBEAT_OK"""
 # 表示"无事可做"的标记
 HEARTBEAT_OK_TOKEN = "HEARTBEAT_OK"
 
+# 在回复中查找该标记：忽略大小写，允许省略或重复下划线（如"HeartbeatOK"）
+_HEARTBEAT_OK_RE = re.compile(r"HEARTBEAT_*OK", re.IGNORECASE)
+
+# 匹配"可执行"的行：去掉首尾空白后非空，且不是标题、HTML注释或空的复选框
+# （"- [ ]"、"* [ ]"、"- [x]"、"* [x]"）。一次扫描完成，无需逐行拆分。
+_ACTIONABLE_LINE_RE = re.compile(
+    r"^[^\S\n]*(?!#|<!--|[-*] \[[ x]\][^\S\n]*$)\S",
+    re.MULTILINE,
+)
+
 
 def _is_heartbeat_empty(content: str | None) -> bool:
     """
@@ -36,17 +48,7 @@ def _is_heartbeat_empty(content: str | None) -> bool:
     """
     if not content:
         return True
-    
-    # 要跳过的行模式：空行、标题、HTML注释、空的复选框
-    skip_patterns = {"- [ ]", "* [ ]", "- [x]", "* [x]"}
-    
-    for line in content.split("\n"):
-        line = line.strip()
-        if not line or line.startswith("#") or line.startswith("<!--") or line in skip_patterns:
-            continue
-        return False  # 找到可执行内容
-    
-    return True
+    return _ACTIONABLE_LINE_RE.search(content) is None
 
 
 class HeartbeatService:
@@ -73,19 +75,30 @@ class HeartbeatService:
         self.enabled = enabled
         self._running = False
         self._task: asyncio.Task | None = None
+        self._heartbeat_path = workspace / "HEARTBEAT.md"
+        # 上次读取时的(mtime_ns, size, 内容)，文件未变化时直接复用
+        self._file_cache: tuple[int, int, str] | None = None
     
     @property
     def heartbeat_file(self) -> Path:
-        return self.workspace / "HEARTBEAT.md"
+        return self._heartbeat_path
     
     def _read_heartbeat_file(self) -> str | None:
-        """Read HEARTBEAT.md content."""
-        if self.heartbeat_file.exists():
-            try:
-                return self.heartbeat_file.read_text()
-            except Exception:
-                return None
-        return None
+        """Read HEARTBEAT.md content, reusing the cached text while mtime/size are unchanged."""
+        try:
+            st = os.stat(self._heartbeat_path)
+        except OSError:
+            self._file_cache = None
+            return None
+        cache = self._file_cache
+        if cache and cache[0] == st.st_mtime_ns and cache[1] == st.st_size:
+            return cache[2]
+        try:
+            content = self._heartbeat_path.read_text()
+        except Exception:
+            return None
+        self._file_cache = (st.st_mtime_ns, st.st_size, content)
+        return content
     
     async def start(self) -> None:
         """Start the heartbeat service."""
@@ -105,12 +118,19 @@ class HeartbeatService:
             self._task = None
     
     async def _run_loop(self) -> None:
-        """Main heartbeat loop."""
+        """Main heartbeat loop, scheduled against monotonic deadlines so tick duration does not drift."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.interval_s
         while self._running:
             try:
-                await asyncio.sleep(self.interval_s)
+                await asyncio.sleep(max(0.0, deadline - loop.time()))
+                deadline += self.interval_s
                 if self._running:
                     await self._tick()
+                # 单次心跳超过一个间隔时跳过错过的时间点，避免连续补跑
+                now = loop.time()
+                if deadline < now:
+                    deadline = now + self.interval_s
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -132,7 +152,7 @@ class HeartbeatService:
                 response = await self.on_heartbeat(HEARTBEAT_PROMPT)
                 
                 # Check if agent said "nothing to do"
-                if HEARTBEAT_OK_TOKEN.replace("_", "") in response.upper().replace("_", ""):
+                if _HEARTBEAT_OK_RE.search(response):
                     logger.info("Heartbeat: OK (no action needed)")
                 else:
                     logger.info(f"Heartbeat: completed task")
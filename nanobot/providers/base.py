@@ -33,16 +33,10 @@ class LLMResponse:
     finish_reason: str = "stop"  # 完成原因（stop、length、tool_calls等）
     usage: dict[str, int] = field(default_factory=dict)  # Token使用统计
     reasoning_content: str | None = None  # 推理内容（用于支持思考过程的模型，如Kimi、DeepSeek-R1等）
+    has_tool_calls: bool = field(init=False)  # 是否包含工具调用，构造时计算一次
     
-    @property
-    def has_tool_calls(self) -> bool:
-        """
-        检查响应是否包含工具调用。
-        
-        Returns:
-            如果包含工具调用返回True，否则返回False
-        """
-        return len(self.tool_calls) > 0
+    def __post_init__(self) -> None:
+        self.has_tool_calls = bool(self.tool_calls)
 
 
 class LLMProvider(ABC):
@@ -8,6 +8,7 @@
 
 import json
 import os
+import sys
 from typing import Any
 
 import litellm
@@ -15,6 +16,25 @@ from litellm import acompletion
 
 from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
 from nanobot.providers.registry import find_by_model, find_gateway
+from nanobot.utils import fastjson
+
+
+def _apply_env(name: str, value: str, override: bool) -> None:
+    """
+    设置LiteLLM使用的环境变量，已是目标值时不再写入。
+
+    写os.environ会调用libc的setenv；重复创建提供者时，大多数变量已经就绪，
+    这里只做一次字典查找即可跳过。
+
+    Args:
+        name: 环境变量名
+        value: 要设置的值
+        override: 是否覆盖已存在的不同值
+    """
+    current = os.environ.get(name)
+    if current == value or (current is not None and not override):
+        return
+    os.environ[name] = value
 
 
 class LiteLLMProvider(LLMProvider):
@@ -50,6 +70,23 @@ class LiteLLMProvider(LLMProvider):
         # api_key / api_base are fallback for auto-detection.
         self._gateway = find_gateway(provider_name, api_key, api_base)
         
+        # 模型名 -> 解析后的LiteLLM模型名；同一会话每轮都传相同模型，避免重复查注册表
+        self._resolved_models: dict[str, str] = {}
+        # 解析后的模型名 -> 该模型的参数覆盖（无覆盖时为空字典）
+        self._override_cache: dict[str, dict[str, Any]] = {}
+        
+        # 每次请求都相同的参数，只构建一次
+        self._base_kwargs: dict[str, Any] = {}
+        # Pass api_key directly — more reliable than env vars alone
+        if api_key:
+            self._base_kwargs["api_key"] = api_key
+        # Pass api_base for custom endpoints
+        if api_base:
+            self._base_kwargs["api_base"] = api_base
+        # Pass extra headers (e.g. APP-Code for AiHubMix)
+        if self.extra_headers:
+            self._base_kwargs["extra_headers"] = self.extra_headers
+        
         # Configure environment variables
         if api_key:
             self._setup_env(api_key, api_base, default_model)
@@ -79,10 +116,7 @@ class LiteLLMProvider(LLMProvider):
             return
 
         # 网关/本地部署覆盖现有环境变量；标准提供者不覆盖
-        if self._gateway:
-            os.environ[spec.env_key] = api_key
-        else:
-            os.environ.setdefault(spec.env_key, api_key)
+        _apply_env(spec.env_key, api_key, override=self._gateway is not None)
 
         # 解析env_extras占位符：
         #   {api_key}  → 用户的API密钥
@@ -91,7 +125,7 @@ class LiteLLMProvider(LLMProvider):
         for env_name, env_val in spec.env_extras:
             resolved = env_val.replace("{api_key}", api_key)
             resolved = resolved.replace("{api_base}", effective_base)
-            os.environ.setdefault(env_name, resolved)
+            _apply_env(env_name, resolved, override=False)
     
     def _resolve_model(self, model: str) -> str:
         """
@@ -107,6 +141,13 @@ class LiteLLMProvider(LLMProvider):
         Returns:
             解析后的模型名称（带前缀）
         """
+        resolved = self._resolved_models.get(model)
+        if resolved is None:
+            resolved = self._resolved_models[model] = self._resolve_model_uncached(model)
+        return resolved
+    
+    def _resolve_model_uncached(self, model: str) -> str:
+        """按网关/注册表规则为模型名称添加前缀（不经缓存）。"""
         if self._gateway:
             # 网关模式：应用网关前缀，跳过提供者特定前缀
             prefix = self._gateway.litellm_prefix
@@ -136,13 +177,22 @@ class LiteLLMProvider(LLMProvider):
             model: 模型名称
             kwargs: 要传递给API的参数字典
         """
+        overrides = self._override_cache.get(model)
+        if overrides is None:
+            overrides = self._override_cache[model] = self._find_model_overrides(model)
+        if overrides:
+            kwargs.update(overrides)
+    
+    @staticmethod
+    def _find_model_overrides(model: str) -> dict[str, Any]:
+        """在注册表中查找模型的参数覆盖，未找到时返回空字典。"""
         model_lower = model.lower()
         spec = find_by_model(model)
         if spec:
             for pattern, overrides in spec.model_overrides:
                 if pattern in model_lower:
-                    kwargs.update(overrides)
-                    return
+                    return overrides
+        return {}
     
     async def chat(
         self,
@@ -168,6 +218,7 @@ class LiteLLMProvider(LLMProvider):
         model = self._resolve_model(model or self.default_model)
         
         kwargs: dict[str, Any] = {
+            **self._base_kwargs,
             "model": model,
             "messages": messages,
             "max_tokens": max_tokens,
@@ -177,18 +228,6 @@ class LiteLLMProvider(LLMProvider):
         # Apply model-specific overrides (e.g. kimi-k2.5 temperature)
         self._apply_model_overrides(model, kwargs)
         
-        # Pass api_key directly — more reliable than env vars alone
-        if self.api_key:
-            kwargs["api_key"] = self.api_key
-        
-        # Pass api_base for custom endpoints
-        if self.api_base:
-            kwargs["api_base"] = self.api_base
-        
-        # Pass extra headers (e.g. APP-Code for AiHubMix)
-        if self.extra_headers:
-            kwargs["extra_headers"] = self.extra_headers
-        
         if tools:
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
@@ -220,36 +259,35 @@ class LiteLLMProvider(LLMProvider):
         message = choice.message
         
         tool_calls = []
-        if hasattr(message, "tool_calls") and message.tool_calls:
-            for tc in message.tool_calls:
-                # 如果需要，从JSON字符串解析参数
-                args = tc.function.arguments
-                if isinstance(args, str):
-                    try:
-                        args = json.loads(args)
-                    except json.JSONDecodeError:
-                        args = {"raw": args}
-                
-                tool_calls.append(ToolCallRequest(
-                    id=tc.id,
-                    name=tc.function.name,
-                    arguments=args,
-                ))
+        for tc in getattr(message, "tool_calls", None) or ():
+            fn = tc.function
+            # 如果需要，从JSON字符串解析参数
+            args = fn.arguments
+            if isinstance(args, str):
+                try:
+                    args = fastjson.loads(args)
+                except json.JSONDecodeError:
+                    args = {"raw": args}
+            
+            tool_calls.append(ToolCallRequest(
+                id=tc.id,
+                name=fn.name,
+                arguments=args,
+            ))
         
-        usage = {}
-        if hasattr(response, "usage") and response.usage:
-            usage = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
-            }
+        u = getattr(response, "usage", None)
+        usage = {
+            "prompt_tokens": u.prompt_tokens,
+            "completion_tokens": u.completion_tokens,
+            "total_tokens": u.total_tokens,
+        } if u else {}
         
         reasoning_content = getattr(message, "reasoning_content", None)
         
         return LLMResponse(
             content=message.content,
             tool_calls=tool_calls,
-            finish_reason=choice.finish_reason or "stop",
+            finish_reason=sys.intern(choice.finish_reason or "stop"),
             usage=usage,
             reasoning_content=reasoning_content,
         )
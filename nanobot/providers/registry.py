@@ -12,11 +12,13 @@
 
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ProviderSpec:
     """
     一个LLM提供者的元数据。参见下面的PROVIDERS了解真实示例。
@@ -311,8 +313,33 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
 )
 
 
+# 标准提供者的(关键词, 规范)扁平列表，按PROVIDERS优先级排列；
+# 网关/本地提供者不参与模型名匹配，预先排除。
+# 关键词在此统一转小写并驻留，不依赖注册表书写约定。
+_MODEL_KEYWORDS: tuple[tuple[str, ProviderSpec], ...] = tuple(
+    (sys.intern(kw.lower()), spec)
+    for spec in PROVIDERS
+    if not (spec.is_gateway or spec.is_local)
+    for kw in spec.keywords
+)
+
+# 配置键 -> 提供者规范
+_NAME_INDEX: dict[str, ProviderSpec] = {spec.name: spec for spec in PROVIDERS}
+
+# 配置键 -> 网关/本地提供者规范，供find_gateway按名称直接命中
+_GATEWAY_BY_NAME: dict[str, ProviderSpec] = {
+    spec.name: spec for spec in PROVIDERS if spec.is_gateway or spec.is_local
+}
+
+# 只有少数规范定义了自动检测规则，预先挑出以免每次遍历整个注册表（保持注册表顺序）
+_DETECT_SPECS: tuple[ProviderSpec, ...] = tuple(
+    spec for spec in PROVIDERS if spec.detect_by_key_prefix or spec.detect_by_base_keyword
+)
+
+
 # ---------------------------------------------------------------------------
 # 查找辅助函数
+# 注册表在导入后不可变，查找结果只取决于参数，因此都做了LRU缓存。
 # ---------------------------------------------------------------------------
 
 def find_by_model(model: str) -> ProviderSpec | None:
@@ -327,15 +354,19 @@ def find_by_model(model: str) -> ProviderSpec | None:
     Returns:
         匹配的ProviderSpec，如果未找到则返回None
     """
-    model_lower = model.lower()
-    for spec in PROVIDERS:
-        if spec.is_gateway or spec.is_local:
-            continue
-        if any(kw in model_lower for kw in spec.keywords):
+    return _find_by_model_lower(model.lower())
+
+
+@lru_cache(maxsize=512)
+def _find_by_model_lower(model_lower: str) -> ProviderSpec | None:
+    """find_by_model的缓存实现，以小写模型名为键。"""
+    for kw, spec in _MODEL_KEYWORDS:
+        if kw in model_lower:
             return spec
     return None
 
 
+@lru_cache(maxsize=64)
 def find_gateway(
     provider_name: str | None = None,
     api_key: str | None = None,
@@ -362,12 +393,12 @@ def find_gateway(
     """
     # 1. 通过配置键直接匹配
     if provider_name:
-        spec = find_by_name(provider_name)
-        if spec and (spec.is_gateway or spec.is_local):
+        spec = _GATEWAY_BY_NAME.get(provider_name)
+        if spec:
             return spec
 
     # 2. 通过api_key前缀/api_base关键词自动检测
-    for spec in PROVIDERS:
+    for spec in _DETECT_SPECS:
         if spec.detect_by_key_prefix and api_key and api_key.startswith(spec.detect_by_key_prefix):
             return spec
         if spec.detect_by_base_keyword and api_base and spec.detect_by_base_keyword in api_base:
@@ -388,7 +419,4 @@ def find_by_name(name: str) -> ProviderSpec | None:
     Returns:
         匹配的ProviderSpec，如果未找到则返回None
     """
-    for spec in PROVIDERS:
-        if spec.name == name:
-            return spec
-    return None
+    return _NAME_INDEX.get(name)
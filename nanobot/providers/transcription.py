@@ -4,6 +4,7 @@
 Groq提供极快的转录速度，并有慷慨的免费额度。
 """
 
+import asyncio
 import os
 from pathlib import Path
 from typing import Any
@@ -18,6 +19,7 @@ class GroqTranscriptionProvider:
     
     Groq提供极快的转录速度，并有慷慨的免费额度。
     使用Whisper Large V3模型进行高精度转录。
+    HTTP客户端在首次转录时创建并复用，保持与Groq的长连接。
     """
     
     def __init__(self, api_key: str | None = None):
@@ -29,6 +31,19 @@ class GroqTranscriptionProvider:
         """
         self.api_key = api_key or os.environ.get("GROQ_API_KEY")
         self.api_url = "https://api.groq.com/openai/v1/audio/transcriptions"
+        self._client: httpx.AsyncClient | None = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取复用的HTTP客户端，首次调用时创建（启用HTTP/2）。"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(http2=True, timeout=60.0)
+        return self._client
+    
+    async def close(self) -> None:
+        """关闭复用的HTTP客户端，释放连接。"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def transcribe(self, file_path: str | Path) -> str:
         """
@@ -53,27 +68,26 @@ class GroqTranscriptionProvider:
             return ""
         
         try:
-            async with httpx.AsyncClient() as client:
-                with open(path, "rb") as f:
-                    files = {
-                        "file": (path.name, f),
-                        "model": (None, "whisper-large-v3"),
-                    }
-                    headers = {
-                        "Authorization": f"Bearer {self.api_key}",
-                    }
-                    
-                    response = await client.post(
-                        self.api_url,
-                        headers=headers,
-                        files=files,
-                        timeout=60.0
-                    )
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    return data.get("text", "")
-                    
+            # 在线程中读入内存再上传：不阻塞事件循环，也不在等待网络期间占用文件句柄
+            audio = await asyncio.to_thread(path.read_bytes)
+            files = {
+                "file": (path.name, audio),
+                "model": (None, "whisper-large-v3"),
+            }
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+            }
+            
+            response = await self._get_client().post(
+                self.api_url,
+                headers=headers,
+                files=files,
+            )
+            
+            response.raise_for_status()
+            data = response.json()
+            return data.get("text", "")
+            
         except Exception as e:
             logger.error(f"Groq transcription error: {e}")
             return ""
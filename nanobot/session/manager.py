@@ -4,7 +4,9 @@
 会话以JSONL格式存储，便于读取和持久化。
 """
 
-import json
+import asyncio
+import os
+from collections import OrderedDict
 from pathlib import Path
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -12,16 +14,34 @@ from typing import Any
 
 from loguru import logger
 
+from nanobot.utils import fastjson
 from nanobot.utils.helpers import ensure_dir, safe_filename
 
 
+# 会话列表索引文件名：每次保存/删除追加一行，列出会话时只需读取这一个文件
+SESSION_INDEX_FILE = "_index.jsonl"
+
+# 索引中过期行（被覆盖的旧条目和删除标记）超过该比例时压缩索引
+INDEX_COMPACT_RATIO = 0.25
+
+# 索引行数达到上次读取时的两倍（且不少于该值）时，追加前重读索引并视情况压缩
+INDEX_COMPACT_MIN_LINES = 64
+
+# 每个会话在内存中最多保留的消息数；更早的消息已落盘，不会再进入LLM上下文
+SESSION_MAX_MESSAGES = 500
+
+# 内存中最多保留的会话数，超出时按最近最少使用淘汰（淘汰前先落盘）
+SESSION_CACHE_SIZE = 1024
+
+
 @dataclass
 class Session:
     """
     对话会话。
     
     一个会话代表一个用户在一个渠道上的对话历史。
-    消息以JSONL格式存储，便于读取和持久化。
+    消息以JSONL格式存储，便于读取和持久化；
+    内存中只保留最近的消息，已落盘的更早消息会被丢弃。
     """
     
     key: str  # 会话键，格式为"channel:chat_id"
@@ -29,6 +49,14 @@ class Session:
     created_at: datetime = field(default_factory=datetime.now)  # 创建时间
     updated_at: datetime = field(default_factory=datetime.now)  # 更新时间
     metadata: dict[str, Any] = field(default_factory=dict)  # 元数据
+    _history: list[dict[str, Any]] = field(init=False, repr=False, compare=False)  # LLM格式的消息投影
+    _persisted_count: int = field(default=0, init=False, repr=False, compare=False)  # 已写入磁盘的消息数
+    _trimmed_count: int = field(default=0, init=False, repr=False, compare=False)  # 已从内存丢弃的早期消息数
+    _generation: int = field(default=0, init=False, repr=False, compare=False)  # 清空次数，用于识别保存期间的clear()
+    
+    def __post_init__(self) -> None:
+        # 一次性投影已有消息，之后随add_message增量追加，get_history无需每轮重建
+        self._history = [{"role": m["role"], "content": m["content"]} for m in self.messages]
     
     def add_message(self, role: str, content: str, **kwargs: Any) -> None:
         """
@@ -39,14 +67,17 @@ class Session:
             content: 消息内容
             **kwargs: 其他消息属性
         """
+        # 消息时间戳与updated_at共用同一次取时
+        now = datetime.now()
         msg = {
             "role": role,
             "content": content,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             **kwargs
         }
         self.messages.append(msg)
-        self.updated_at = datetime.now()
+        self._history.append({"role": role, "content": content})
+        self.updated_at = now
     
     def get_history(self, max_messages: int = 50) -> list[dict[str, Any]]:
         """
@@ -61,11 +92,8 @@ class Session:
         Returns:
             LLM格式的消息列表
         """
-        # 获取最近的消息
-        recent = self.messages[-max_messages:] if len(self.messages) > max_messages else self.messages
-        
-        # 转换为LLM格式（只包含role和content）
-        return [{"role": m["role"], "content": m["content"]} for m in recent]
+        # 投影列表与messages同步维护，这里只需切片（切片返回新列表，调用方可自由extend）
+        return self._history[-max_messages:]
     
     def clear(self) -> None:
         """
@@ -74,7 +102,25 @@ class Session:
         保留会话本身，只清空消息列表。
         """
         self.messages = []
+        self._history = []
+        self._persisted_count = 0  # 下次保存时整体重写文件
+        self._trimmed_count = 0
+        self._generation += 1
         self.updated_at = datetime.now()
+    
+    @property
+    def total_messages(self) -> int:
+        """会话的消息总数，包括已落盘并从内存丢弃的早期消息。"""
+        return self._trimmed_count + len(self.messages)
+    
+    def _trim_persisted(self, limit: int) -> None:
+        """丢弃超出limit条的最早消息，只丢弃已写入磁盘的部分。"""
+        excess = min(len(self.messages) - limit, self._persisted_count)
+        if excess > 0:
+            del self.messages[:excess]
+            del self._history[:excess]
+            self._persisted_count -= excess
+            self._trimmed_count += excess
 
 
 class SessionManager:
@@ -82,20 +128,30 @@ class SessionManager:
     管理对话会话。
     
     会话管理器负责创建、加载、保存和删除会话。
-    会话以JSONL格式存储在sessions目录中，每个会话对应一个文件。
-    使用内存缓存提高访问性能。
+    会话消息以JSONL格式存储在sessions目录中，每个会话对应一个文件，
+    保存时只追加新消息；元数据存放在同名的.meta.json旁路文件中，
+    并追加到会话列表索引，列出会话时无需逐个打开文件。
+    使用有上限的LRU内存缓存提高访问性能。
     """
     
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, max_cached: int = SESSION_CACHE_SIZE):
         """
         初始化会话管理器。
         
         Args:
             workspace: 工作空间路径（当前未使用，保留用于未来扩展）
+            max_cached: 内存中最多缓存的会话数
         """
         self.workspace = workspace
         self.sessions_dir = ensure_dir(Path.home() / ".nanobot" / "sessions")
-        self._cache: dict[str, Session] = {}  # 内存缓存，提高访问性能
+        self._index_path = self.sessions_dir / SESSION_INDEX_FILE
+        self.max_cached = max_cached
+        self._cache: OrderedDict[str, Session] = OrderedDict()  # LRU内存缓存，提高访问性能
+        self._io_lock = asyncio.Lock()  # 串行化异步保存，保证追加顺序
+        self._evicting: dict[str, Session] = {}  # 已被淘汰、尚未落盘完成的会话
+        self._bg_tasks: set[asyncio.Task] = set()  # 淘汰落盘的后台任务
+        self._index_lines = 0  # 会话列表索引的当前行数
+        self._index_check_at = 0  # 索引行数达到该值时重读并视情况压缩；0表示尚未读取
     
     def _get_session_path(self, key: str) -> Path:
         """
@@ -110,6 +166,32 @@ class SessionManager:
         safe_key = safe_filename(key.replace(":", "_"))
         return self.sessions_dir / f"{safe_key}.jsonl"
     
+    @staticmethod
+    def _meta_path(path: Path) -> Path:
+        """获取会话文件对应的元数据旁路文件路径。"""
+        return path.with_suffix(".meta.json")
+    
+    @staticmethod
+    def _read_meta(path: Path, has_sidecar: bool) -> dict[str, Any] | None:
+        """
+        读取会话元数据。
+        
+        优先读取旁路文件；旧格式的会话没有旁路文件，则回退到JSONL首行的元数据行。
+        
+        Args:
+            path: 会话消息文件路径
+            has_sidecar: 是否存在旁路元数据文件（由调用方的目录扫描得出，省去stat）
+        """
+        if has_sidecar:
+            return fastjson.loads(SessionManager._meta_path(path).read_bytes())
+        with open(path, "rb") as f:
+            first_line = f.readline().strip()
+        if first_line:
+            data = fastjson.loads(first_line)
+            if data.get("_type") == "metadata":
+                return data
+        return None
+    
     def get_or_create(self, key: str) -> Session:
         """
         获取现有会话或创建新会话。
@@ -124,17 +206,94 @@ class SessionManager:
             会话对象
         """
         # 检查缓存
-        if key in self._cache:
-            return self._cache[key]
+        session = self._cache.get(key)
+        if session is not None:
+            self._cache.move_to_end(key)
+            return session
         
-        # 尝试从磁盘加载
-        session = self._load(key)
+        # 刚被淘汰、仍在落盘的会话直接取回内存对象，避免读到尚未写完的文件
+        session = self._evicting.get(key)
         if session is None:
-            session = Session(key=key)
+            # 尝试从磁盘加载
+            session = self._load(key)
+            if session is None:
+                session = Session(key=key)
         
-        self._cache[key] = session
+        self._schedule_evicted(self._remember(session))
         return session
     
+    def _remember(self, session: Session) -> list[Session]:
+        """
+        将会话放入LRU缓存。
+        
+        Returns:
+            超出上限而被淘汰的最久未用会话，由调用方负责落盘
+        """
+        self._cache[session.key] = session
+        self._cache.move_to_end(session.key)
+        victims = []
+        while len(self._cache) > self.max_cached:
+            _, victim = self._cache.popitem(last=False)
+            self._evicting[victim.key] = victim
+            victims.append(victim)
+        return victims
+    
+    def _schedule_evicted(self, victims: list[Session]) -> None:
+        """落盘被淘汰的会话：在事件循环中时交给后台任务（线程池写盘），否则同步写入。"""
+        if not victims:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            prepared = [self._prepare(v) for v in victims]
+            self._commit_evicted(victims, prepared, self._flush_evicted(victims, prepared))
+            self._forget_evicted(victims)
+            return
+        task = asyncio.create_task(self._aflush_evicted(victims))
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+    
+    async def _aflush_evicted(self, victims: list[Session]) -> None:
+        """在_io_lock下把被淘汰的会话交给线程池落盘。"""
+        async with self._io_lock:
+            # 等锁期间被delete()删除的会话不再写回
+            victims = [v for v in victims if self._evicting.get(v.key) is v]
+            prepared = [self._prepare(v) for v in victims]
+            try:
+                results = await asyncio.to_thread(self._flush_evicted, victims, prepared)
+                self._commit_evicted(victims, prepared, results)
+            finally:
+                self._forget_evicted(victims)
+    
+    def _flush_evicted(self, victims: list[Session], prepared: list[tuple]) -> list[bool]:
+        """
+        写入被淘汰会话的序列化结果；单个失败只记录日志。
+        
+        Returns:
+            每个会话是否写入成功
+        """
+        results = []
+        for victim, (job, _, _) in zip(victims, prepared):
+            try:
+                self._flush(*job)
+                results.append(True)
+            except Exception as e:
+                logger.warning(f"Failed to flush evicted session {victim.key}: {e}")
+                results.append(False)
+        return results
+    
+    def _commit_evicted(self, victims: list[Session], prepared: list[tuple], results: list[bool]) -> None:
+        """标记写入成功的被淘汰会话（它们可能已被重新取回缓存）。"""
+        for victim, (_, count, generation), ok in zip(victims, prepared, results):
+            if ok:
+                self._commit(victim, count, generation)
+    
+    def _forget_evicted(self, victims: list[Session]) -> None:
+        """落盘完成后移除淘汰记录（会话已被重新取回缓存时同样移除）。"""
+        for victim in victims:
+            if self._evicting.get(victim.key) is victim:
+                del self._evicting[victim.key]
+    
     def _load(self, key: str) -> Session | None:
         """
         从磁盘加载会话。
@@ -151,32 +310,29 @@ class SessionManager:
             return None
         
         try:
-            messages = []
-            metadata = {}
-            created_at = None
+            meta: dict[str, Any] = {}
             
-            with open(path) as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    data = json.loads(line)
-                    
-                    if data.get("_type") == "metadata":
-                        # 元数据行
-                        metadata = data.get("metadata", {})
-                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-                    else:
-                        # 消息行
-                        messages.append(data)
+            # 一次读入整个文件再逐行解析，省去逐行读取的Python层开销
+            messages = [fastjson.loads(line) for line in path.read_bytes().splitlines() if line.strip()]
+            if messages and messages[0].get("_type") == "metadata":
+                # 旧格式文件首行是元数据行
+                meta = messages.pop(0)
             
-            return Session(
+            # 旁路文件中的元数据比JSONL中的旧元数据行更新
+            meta_path = self._meta_path(path)
+            if meta_path.exists():
+                meta = fastjson.loads(meta_path.read_bytes())
+            
+            created_at = meta.get("created_at")
+            session = Session(
                 key=key,
                 messages=messages,
-                created_at=created_at or datetime.now(),
-                metadata=metadata
+                created_at=datetime.fromisoformat(created_at) if created_at else datetime.now(),
+                metadata=meta.get("metadata", {})
             )
+            session._persisted_count = len(messages)
+            session._trim_persisted(SESSION_MAX_MESSAGES)
+            return session
         except Exception as e:
             logger.warning(f"Failed to load session {key}: {e}")
             return None
@@ -185,28 +341,211 @@ class SessionManager:
         """
         将会话保存到磁盘。
         
-        会话以JSONL格式保存，第一行是元数据，后续行是消息。
+        消息文件只追加上次保存之后新增的消息，每轮写入量与历史长度无关；
+        会话被清空后才整体重写。元数据写入旁路文件，通过临时文件原子替换。
+        
+        Args:
+            session: 要保存的会话
+        """
+        self._write(session)
+        victims = self._remember(session)
+        prepared = [self._prepare(v) for v in victims]
+        self._commit_evicted(victims, prepared, self._flush_evicted(victims, prepared))
+        self._forget_evicted(victims)
+    
+    async def asave(self, session: Session) -> None:
+        """
+        异步保存会话。
+        
+        序列化在事件循环中完成（只涉及新增消息），磁盘写入交给线程池，
+        不阻塞事件循环；多个保存按调用顺序串行落盘。
+        因本次保存而被LRU淘汰的会话也在同一次线程池调用中落盘。
         
         Args:
             session: 要保存的会话
         """
+        async with self._io_lock:
+            job, count, generation = self._prepare(session)
+            victims = self._remember(session)
+            prepared = [self._prepare(v) for v in victims]
+            try:
+                results, error = await asyncio.to_thread(self._flush_saved, job, victims, prepared)
+                # 会话状态只在事件循环线程中修改
+                self._commit_evicted(victims, prepared, results)
+            finally:
+                self._forget_evicted(victims)
+            if error is not None:
+                raise error
+            self._commit(session, count, generation)
+    
+    def _flush_saved(
+        self, job: tuple, victims: list[Session], prepared: list[tuple]
+    ) -> tuple[list[bool], Exception | None]:
+        """线程池中执行：先落盘被淘汰的会话，再写入本次保存的会话（异常交回调用方抛出）。"""
+        results = self._flush_evicted(victims, prepared)
+        try:
+            self._flush(*job)
+        except Exception as e:
+            return results, e
+        return results, None
+    
+    def _write(self, session: Session) -> None:
+        """将会话写入磁盘（不触碰缓存），成功后标记为已持久化。"""
+        job, count, generation = self._prepare(session)
+        self._flush(*job)
+        self._commit(session, count, generation)
+    
+    def _commit(self, session: Session, count: int, generation: int) -> None:
+        """
+        写入成功后把前count条消息标记为已持久化，并丢弃超出上限的早期消息。
+        
+        保存期间会话被clear()时不做标记，下次保存会整体重写文件。
+        """
+        if session._generation != generation:
+            return
+        session._persisted_count = count
+        session._trim_persisted(SESSION_MAX_MESSAGES)
+    
+    def _prepare(self, session: Session) -> tuple[tuple[Path, str, bytes, bytes, bytes], int, int]:
+        """
+        序列化待写入的内容，不修改会话状态（写入成功后再由_commit标记）。
+        
+        Returns:
+            ((消息文件路径, 打开模式, 消息数据, 元数据, 索引条目), 本次写到的消息数, 会话清空代数)
+        """
         path = self._get_session_path(session.key)
         
-        with open(path, "w") as f:
-            # 首先写入元数据
-            metadata_line = {
-                "_type": "metadata",
-                "created_at": session.created_at.isoformat(),
-                "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata
-            }
-            f.write(json.dumps(metadata_line) + "\n")
-            
-            # 写入消息
-            for msg in session.messages:
-                f.write(json.dumps(msg) + "\n")
+        count = len(session.messages)
+        persisted = session._persisted_count
+        mode = "ab" if persisted and persisted <= count else "wb"
+        if mode == "wb":
+            persisted = 0
+        payload = b"".join(
+            fastjson.dumps_bytes(msg, newline=True) for msg in session.messages[persisted:count]
+        )
+        created_at = session.created_at.isoformat()
+        updated_at = session.updated_at.isoformat()
+        meta = {
+            "key": session.key,  # 文件名由键转换而来且不可逆，重建索引时需要真实的键
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "metadata": session.metadata
+        }
+        entry = {
+            "key": session.key,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "path": str(path)
+        }
+        job = (
+            path, mode, payload,
+            fastjson.dumps_bytes(meta, newline=True),
+            fastjson.dumps_bytes(entry, newline=True),
+        )
+        return job, count, session._generation
+    
+    def _flush(self, path: Path, mode: str, payload: bytes, meta: bytes, entry: bytes) -> None:
+        """将序列化好的消息、元数据和索引条目写入磁盘。"""
+        with open(path, mode) as f:
+            f.write(payload)
         
-        self._cache[session.key] = session
+        meta_path = self._meta_path(path)
+        tmp_path = meta_path.with_name(meta_path.name + ".tmp")
+        tmp_path.write_bytes(meta)
+        os.replace(tmp_path, meta_path)
+        
+        self._append_index(entry)
+    
+    def _append_index(self, entry: bytes) -> None:
+        """
+        向会话列表索引追加一行；索引不存在时先从目录扫描重建，以收录已有会话。
+        
+        行数自上次读取后翻倍时先重读索引并视情况压缩，使索引大小与会话数成正比。
+        """
+        if not self._index_path.exists():
+            self._write_index(self._scan_sessions())
+        elif self._index_lines >= self._index_check_at:
+            self._read_index()
+        with open(self._index_path, "ab") as f:
+            f.write(entry)
+        self._index_lines += 1
+    
+    def _write_index(self, entries: list[dict[str, Any]]) -> None:
+        """通过临时文件原子替换，整体重写会话列表索引。"""
+        tmp_path = self._index_path.with_name(self._index_path.name + ".tmp")
+        tmp_path.write_bytes(b"".join(fastjson.dumps_bytes(e, newline=True) for e in entries))
+        os.replace(tmp_path, self._index_path)
+        self._index_lines = len(entries)
+        self._index_check_at = max(2 * len(entries), INDEX_COMPACT_MIN_LINES)
+    
+    def _read_index(self) -> list[dict[str, Any]]:
+        """
+        读取会话列表索引，同一会话以最后一行为准。
+        
+        过期行占比超过INDEX_COMPACT_RATIO时顺带压缩索引。
+        
+        Returns:
+            仍存在的会话条目
+        """
+        latest: dict[str, dict[str, Any]] = {}
+        total = 0
+        with open(self._index_path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = fastjson.loads(line)
+                except Exception:
+                    continue
+                total += 1
+                if entry.get("deleted"):
+                    latest.pop(entry["key"], None)
+                else:
+                    latest[entry["key"]] = entry
+        
+        sessions = list(latest.values())
+        if total and (total - len(sessions)) / total > INDEX_COMPACT_RATIO:
+            try:
+                self._write_index(sessions)
+                return sessions
+            except Exception as e:
+                logger.warning(f"Failed to compact session index: {e}")
+        
+        self._index_lines = total
+        self._index_check_at = max(2 * total, INDEX_COMPACT_MIN_LINES)
+        return sessions
+    
+    def _scan_sessions(self) -> list[dict[str, Any]]:
+        """
+        扫描sessions目录，读取每个会话的元数据（用于重建索引）。
+        
+        会话键优先取旁路元数据中的真实键；旧版本写入的文件没有记录键，
+        只能按文件名还原（"_"一律视为":"）。
+        """
+        sessions = []
+        
+        # 一次scandir拿到全部文件名，旁路文件是否存在直接查集合
+        with os.scandir(self.sessions_dir) as it:
+            names = {entry.name for entry in it}
+        
+        for name in names:
+            if not name.endswith(".jsonl") or name == SESSION_INDEX_FILE:
+                continue
+            path = self.sessions_dir / name
+            try:
+                data = self._read_meta(path, name[:-len(".jsonl")] + ".meta.json" in names)
+                if data is not None:
+                    sessions.append({
+                        "key": data.get("key") or path.stem.replace("_", ":"),
+                        "created_at": data.get("created_at"),
+                        "updated_at": data.get("updated_at"),
+                        "path": str(path)
+                    })
+            except Exception:
+                continue
+        
+        return sessions
     
     def delete(self, key: str) -> bool:
         """
@@ -222,11 +561,14 @@ class SessionManager:
         """
         # 从缓存中移除
         self._cache.pop(key, None)
+        self._evicting.pop(key, None)
         
         # 删除文件
         path = self._get_session_path(key)
+        self._meta_path(path).unlink(missing_ok=True)
         if path.exists():
             path.unlink()
+            self._append_index(fastjson.dumps_bytes({"key": key, "deleted": True}, newline=True))
             return True
         return False
     
@@ -234,28 +576,15 @@ class SessionManager:
         """
         列出所有会话。
         
-        扫描sessions目录，读取每个会话文件的元数据。
+        只读取会话列表索引，同一会话以最后一行为准；索引不存在时扫描目录重建。
         
         Returns:
             会话信息字典列表，按更新时间降序排列
         """
-        sessions = []
-        
-        for path in self.sessions_dir.glob("*.jsonl"):
-            try:
-                # 只读取元数据行
-                with open(path) as f:
-                    first_line = f.readline().strip()
-                    if first_line:
-                        data = json.loads(first_line)
-                        if data.get("_type") == "metadata":
-                            sessions.append({
-                                "key": path.stem.replace("_", ":"),
-                                "created_at": data.get("created_at"),
-                                "updated_at": data.get("updated_at"),
-                                "path": str(path)
-                            })
-            except Exception:
-                continue
+        if not self._index_path.exists():
+            sessions = self._scan_sessions()
+            self._write_index(sessions)
+            return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
         
+        sessions = self._read_index()
         return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
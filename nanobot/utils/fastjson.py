@@ -0,0 +1,107 @@
+"""基于orjson的JSON加速工具。
+
+orjson是可选依赖：未安装时所有函数都回退到标准库json，行为保持不变。
+"""
+
+import json
+from types import ModuleType
+from typing import Any
+
+from loguru import logger
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def loads(data: str | bytes) -> Any:
+    """
+    解析JSON文本。
+
+    Args:
+        data: JSON字符串或字节串
+
+    Returns:
+        解析后的Python对象
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, **kwargs: Any) -> str:
+    """
+    序列化为JSON字符串。
+
+    只在没有额外参数时走orjson；带``indent``等参数或orjson无法编码
+    （如非字符串键、超大整数）时回退到标准库json。
+
+    Args:
+        obj: 要序列化的对象
+        **kwargs: 透传给``json.dumps``的参数
+
+    Returns:
+        JSON字符串
+    """
+    if ORJSON_AVAILABLE and not kwargs:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, **kwargs)
+
+
+def dumps_bytes(obj: Any, *, indent: bool = False, newline: bool = False) -> bytes:
+    """
+    序列化为UTF-8 JSON字节串，适合直接写文件或作为请求体。
+
+    orjson无法编码时回退到标准库json（``ensure_ascii=False``，与orjson输出的字符一致）。
+
+    Args:
+        obj: 要序列化的对象
+        indent: 是否以两个空格缩进输出（用于人工可读的配置/状态文件），默认紧凑输出
+        newline: 是否在末尾追加换行符（用于JSONL逐行写入）
+
+    Returns:
+        JSON字节串
+    """
+    if ORJSON_AVAILABLE:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_APPEND_NEWLINE if newline else 0)
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            pass  # orjson无法编码的值（如超大整数）交给标准库处理
+    text = json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+    return (text + "\n" if newline else text).encode("utf-8")
+
+
+class _JsonShim:
+    """替换第三方模块中``json``引用的对象，只接管loads/dumps。"""
+
+    loads = staticmethod(loads)
+    dumps = staticmethod(dumps)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(json, name)
+
+
+def patch_module_json(module: ModuleType) -> bool:
+    """
+    将第三方SDK模块内的``json``引用替换为orjson加速版本。
+
+    只修改目标模块自己的全局名``json``，不影响标准库json本身。
+
+    Args:
+        module: 通过``import json``使用标准库的模块
+
+    Returns:
+        是否完成替换
+    """
+    if not ORJSON_AVAILABLE or getattr(module, "json", None) is not json:
+        return False
+    module.json = _JsonShim()
+    logger.debug(f"Using orjson for {module.__name__}")
+    return True
@@ -3,21 +3,35 @@
 此模块提供了各种辅助函数，用于路径管理、字符串处理、日期时间等常见操作。
 """
 
+import re
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
 
+# 文件名中的不安全字符
+_UNSAFE_FILENAME_RE = re.compile(r'[<>:"/\\|?*]')
+
+# 本进程内已确认存在的目录，避免重复的mkdir系统调用
+_ensured_dirs: set[str] = set()
+
+
 def ensure_dir(path: Path) -> Path:
     """
     确保目录存在，如果不存在则创建。
     
+    同一目录在进程内只会真正调用一次mkdir。
+    
     Args:
         path: 目录路径
     
     Returns:
         目录路径（确保已存在）
     """
-    path.mkdir(parents=True, exist_ok=True)
+    key = str(path)
+    if key not in _ensured_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _ensured_dirs.add(key)
     return path
 
 
@@ -125,11 +139,13 @@ def truncate_string(s: str, max_len: int = 100, suffix: str = "...") -> str:
     return s[: max_len - len(suffix)] + suffix
 
 
+@lru_cache(maxsize=1024)
 def safe_filename(name: str) -> str:
     """
     将字符串转换为安全的文件名。
     
     替换文件名中的不安全字符（如 < > : " / \ | ? *）为下划线。
+    会话键等输入会反复出现，结果按输入缓存。
     
     Args:
         name: 原始字符串
@@ -137,11 +153,8 @@ def safe_filename(name: str) -> str:
     Returns:
         安全的文件名
     """
-    # 替换不安全字符
-    unsafe = '<>:"/\\|?*'
-    for char in unsafe:
-        name = name.replace(char, "_")
-    return name.strip()
+    # 一次正则替换所有不安全字符；名称本身安全时不产生新字符串
+    return _UNSAFE_FILENAME_RE.sub("_", name).strip()
 
 
 def parse_session_key(key: str) -> tuple[str, str]:
@@ -0,0 +1,21 @@
+import pytest
+
+from nanobot.heartbeat.service import _is_heartbeat_empty
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        (None, True),
+        ("", True),
+        ("\n  \n\t\n", True),
+        ("# Heartbeat\n\n<!-- notes -->\n- [ ]\n* [x]\n", True),
+        ("  - [ ]  \r\n", True),
+        ("# Tasks\n- [ ] water the plants\n", False),
+        ("- [X]\n", False),
+        ("## Header\ncheck the inbox", False),
+        ("   do something   ", False),
+    ],
+)
+def test_is_heartbeat_empty(content: str | None, expected: bool) -> None:
+    assert _is_heartbeat_empty(content) is expected
@@ -0,0 +1,79 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.mochat import MochatBufferedEntry, MochatChannel
+from nanobot.config.schema import MochatConfig
+
+
+@pytest.mark.asyncio
+async def test_entries_arriving_during_dispatch_go_out_as_tail_batch(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    channel = MochatChannel(MochatConfig(reply_delay_ms=60000), MessageBus())
+
+    batches: list[list[str]] = []
+    dispatching = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_dispatch(target_id, target_kind, entries, was_mentioned) -> None:
+        batches.append([e.raw_body for e in entries])
+        if len(batches) == 1:
+            dispatching.set()
+            await release.wait()
+
+    monkeypatch.setattr(channel, "_dispatch_entries", slow_dispatch)
+
+    def entry(body: str) -> MochatBufferedEntry:
+        return MochatBufferedEntry(raw_body=body, author="u1")
+
+    await channel._enqueue_delayed_entry("k", "panel1", "panel", entry("a"))
+    flush = asyncio.create_task(
+        channel._flush_delayed_entries("k", "panel1", "panel", "mention", entry("b"))
+    )
+    await dispatching.wait()
+    await channel._enqueue_delayed_entry("k", "panel1", "panel", entry("c"))
+    await channel._enqueue_delayed_entry("k", "panel1", "panel", entry("d"))
+
+    state = channel._delay_states["k"]
+    assert state.timer is None
+
+    release.set()
+    await flush
+
+    assert batches == [["a", "b"], ["c", "d"]]
+    assert not state.flushing and not state.entries and state.timer is None
+
+
+@pytest.mark.asyncio
+async def test_auto_discovered_sessions_are_capped_by_activity(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    channel = MochatChannel(
+        MochatConfig(sessions=["*", "pinned"], max_cached_sessions=3), MessageBus()
+    )
+    channel._seed_targets_from_config()
+    assert channel._auto_discover_sessions
+
+    listed: list[str] = []
+
+    async def list_sessions(path, payload):
+        return {"sessions": [{"sessionId": sid, "converseId": f"c-{sid}"} for sid in listed]}
+
+    monkeypatch.setattr(channel, "_post_json", list_sessions)
+
+    listed[:] = ["s1", "s2"]
+    await channel._refresh_sessions_directory(subscribe_new=False)
+    channel._mark_session_cursor("s1", 5)
+
+    listed[:] = ["s1", "s2", "s3"]
+    await channel._refresh_sessions_directory(subscribe_new=False)
+
+    assert channel._session_set == {"pinned", "s1", "s3"}
+    assert list(channel._session_activity) == ["pinned", "s1", "s3"]
+    assert dict(channel._session_cursor) == {"s1": 5}
+    assert "s2" not in channel._cold_sessions
@@ -0,0 +1,192 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from nanobot.session.manager import SessionManager
+
+
+@pytest.fixture
+def manager(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> SessionManager:
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    return SessionManager(tmp_path / "workspace")
+
+
+def _reload(manager: SessionManager, key: str):
+    manager._cache.clear()
+    return manager.get_or_create(key)
+
+
+def test_save_appends_and_round_trips(manager: SessionManager) -> None:
+    session = manager.get_or_create("telegram:1")
+    session.metadata["lang"] = "zh"
+    session.add_message("user", "hi")
+    manager.save(session)
+    session.add_message("assistant", "hello")
+    manager.save(session)
+
+    path = manager._get_session_path("telegram:1")
+    assert len(path.read_text().splitlines()) == 2
+
+    loaded = _reload(manager, "telegram:1")
+    assert loaded.get_history() == [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+    ]
+    assert loaded.metadata == {"lang": "zh"}
+    assert [s["key"] for s in manager.list_sessions()] == ["telegram:1"]
+
+
+def test_save_rewrites_after_clear(manager: SessionManager) -> None:
+    session = manager.get_or_create("cli:direct")
+    for i in range(3):
+        session.add_message("user", f"m{i}")
+    manager.save(session)
+    session.clear()
+    session.add_message("user", "fresh")
+    manager.save(session)
+
+    loaded = _reload(manager, "cli:direct")
+    assert loaded.get_history() == [{"role": "user", "content": "fresh"}]
+
+    assert manager.delete("cli:direct")
+    assert manager.list_sessions() == []
+    assert [p.name for p in manager.sessions_dir.iterdir()] == ["_index.jsonl"]
+
+
+def test_cache_evicts_least_recently_used(manager: SessionManager) -> None:
+    manager.max_cached = 2
+    first = manager.get_or_create("a:1")
+    first.add_message("user", "unsaved")
+    manager.get_or_create("b:1")
+    manager.get_or_create("a:1")
+    manager.get_or_create("c:1")
+
+    assert list(manager._cache) == ["a:1", "c:1"]
+
+    manager.get_or_create("d:1")
+    assert "a:1" not in manager._cache
+    assert manager._load("a:1").get_history() == [{"role": "user", "content": "unsaved"}]
+
+
+@pytest.mark.asyncio
+async def test_asave_appends_off_loop(manager: SessionManager) -> None:
+    session = manager.get_or_create("slack:C1")
+    session.add_message("user", "one")
+    await manager.asave(session)
+    session.add_message("assistant", "two")
+    await manager.asave(session)
+
+    loaded = _reload(manager, "slack:C1")
+    assert [m["content"] for m in loaded.messages] == ["one", "two"]
+
+
+async def test_failed_save_keeps_messages_pending(
+    manager: SessionManager, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    session = manager.get_or_create("cli:flaky")
+    session.add_message("user", "1")
+    session.add_message("user", "2")
+    manager.save(session)
+
+    flush = manager._flush
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    session.add_message("user", "3")
+    session.add_message("user", "4")
+    monkeypatch.setattr(manager, "_flush", fail)
+    with pytest.raises(OSError):
+        manager.save(session)
+    with pytest.raises(OSError):
+        await manager.asave(session)
+    monkeypatch.setattr(manager, "_flush", flush)
+
+    session.add_message("user", "5")
+    await manager.asave(session)
+
+    loaded = _reload(manager, "cli:flaky")
+    assert [m["content"] for m in loaded.messages] == ["1", "2", "3", "4", "5"]
+
+
+def test_memory_keeps_recent_messages_only(
+    manager: SessionManager, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("nanobot.session.manager.SESSION_MAX_MESSAGES", 3)
+    session = manager.get_or_create("qq:1")
+    for i in range(5):
+        session.add_message("user", f"m{i}")
+    manager.save(session)
+    session.add_message("user", "m5")
+    manager.save(session)
+
+    assert [m["content"] for m in session.get_history()] == ["m3", "m4", "m5"]
+    assert session.total_messages == 6
+    assert len(manager._get_session_path("qq:1").read_text().splitlines()) == 6
+    loaded = _reload(manager, "qq:1")
+    assert [m["content"] for m in loaded.messages] == ["m3", "m4", "m5"]
+    assert loaded.total_messages == 6
+    loaded.clear()
+    assert loaded.total_messages == 0
+
+
+def test_index_keeps_keys_with_underscores(manager: SessionManager) -> None:
+    key = "mochat:session_abc"
+    session = manager.get_or_create(key)
+    session.add_message("user", "hi")
+    manager.save(session)
+
+    assert [s["key"] for s in manager.list_sessions()] == [key]
+
+    assert manager.delete(key)
+    assert manager.list_sessions() == []
+
+    manager._index_path.unlink()
+    session = manager.get_or_create(key)
+    session.add_message("user", "again")
+    manager.save(session)
+    manager._index_path.unlink()
+    assert [s["key"] for s in manager.list_sessions()] == [key]
+
+
+def test_index_stays_bounded_without_listing(manager: SessionManager) -> None:
+    session = manager.get_or_create("cli:busy")
+    for i in range(500):
+        session.add_message("user", f"m{i}")
+        manager.save(session)
+
+    assert len(manager._index_path.read_bytes().splitlines()) <= 64
+    assert [s["key"] for s in manager.list_sessions()] == ["cli:busy"]
+
+
+def test_index_rebuild_lists_legacy_files(manager: SessionManager) -> None:
+    path = manager.sessions_dir / "telegram_42.jsonl"
+    path.write_text(
+        '{"_type": "metadata", "created_at": "2024-01-01T00:00:00", '
+        '"updated_at": "2024-01-02T00:00:00", "metadata": {}}\n'
+        '{"role": "user", "content": "hi"}\n'
+    )
+
+    sessions = manager.list_sessions()
+    assert [s["key"] for s in sessions] == ["telegram:42"]
+    assert sessions[0]["updated_at"] == "2024-01-02T00:00:00"
+
+
+@pytest.mark.asyncio
+async def test_eviction_flushes_in_background(manager: SessionManager) -> None:
+    manager.max_cached = 1
+    first = manager.get_or_create("a:1")
+    first.add_message("user", "unsaved")
+
+    second = manager.get_or_create("b:1")
+    assert manager._bg_tasks
+    assert manager.get_or_create("a:1") is first
+
+    second.add_message("user", "hello")
+    await manager.asave(second)
+    await asyncio.gather(*manager._bg_tasks)
+
+    assert not manager._evicting
+    assert manager._load("a:1").get_history() == [{"role": "user", "content": "unsaved"}]
+    assert manager._load("b:1").get_history() == [{"role": "user", "content": "hello"}]
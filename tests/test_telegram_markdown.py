@@ -0,0 +1,34 @@
+import pytest
+
+from nanobot.channels.telegram import _markdown_to_telegram_html
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("", ""),
+        ("hello world", "hello world"),
+        ("a < b & c > d", "a &lt; b &amp; c &gt; d"),
+        ("# Title\nSome **bold** and __bold2__ text",
+         "Title\nSome <b>bold</b> and <b>bold2</b> text"),
+        ("> quote here\n> - item in quote", "quote here\n• item in quote"),
+        ("- item1\n* item2", "• item1\n• item2"),
+        ("Use `code <x>` & more", "Use <code>code &lt;x&gt;</code> &amp; more"),
+        ("```python\nprint('<hi>')\n# not heading\n```\nafter",
+         "<pre><code>print('&lt;hi&gt;')\n# not heading\n</code></pre>\nafter"),
+        ("[link **b**](http://a.com/?a=1&b=2)",
+         '<a href="http://a.com/?a=1&amp;b=2">link <b>b</b></a>'),
+        ("some_var_name and _italic_ text", "some_var_name and <i>italic</i> text"),
+        ("~~strike~~ it", "<s>strike</s> it"),
+        ("**bold `code` inside**", "<b>bold <code>code</code> inside</b>"),
+        ("_private vars\n__init__", "_private vars\n<b>init</b>"),
+        ("3 * 4 * 5", "3 * 4 * 5"),
+        ("**Pass `**kwargs` here**", "<b>Pass <code>**kwargs</code> here</b>"),
+        ("~~drop `a~~b` now~~", "<s>drop <code>a~~b</code> now</s>"),
+        ("**a ` b**", "<b>a ` b</b>"),
+        ("_a `_` b_", "<i>a <code>_</code> b</i>"),
+        ("_a ` b_", "<i>a ` b</i>"),
+    ],
+)
+def test_markdown_to_telegram_html(text: str, expected: str) -> None:
+    assert _markdown_to_telegram_html(text) == expected